@@ -0,0 +1,93 @@
+import argparse
+import asyncio
+import os
+import time
+import uuid
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / ".env")
+
+import server  # noqa: E402
+from fastapi import HTTPException  # noqa: E402
+
+# Hammers the inventory reservation path with concurrent two-line orders and
+# checks that stock never goes negative and rolled-back lines are returned.
+# Runs against a scratch database so it never touches real stock.
+bench_db_name = os.environ.get("BENCH_DB_NAME") or f"{server.db_name}_bench"
+server.db = server.client[bench_db_name]
+
+
+def _product(product_id: str, variant_id: str, stock: int) -> dict:
+    return {
+        "id": product_id,
+        "name": f"Bench {product_id}",
+        "slug": product_id,
+        "status": "active",
+        "variants": [{"id": variant_id, "sku": f"SKU-{product_id}", "stock": stock, "priceAdjustment": 0.0}],
+    }
+
+
+async def _stock(product_id: str) -> int:
+    doc = await server.db.products.find_one({"id": product_id}, {"variants.stock": 1})
+    return int(doc["variants"][0]["stock"])
+
+
+async def main(stock: int, requests: int, concurrency: int, quantity: int):
+    run = uuid.uuid4().hex[:8]
+    pid_a, pid_b = f"bench_a_{run}", f"bench_b_{run}"
+    stock_b = stock // 2
+
+    await server.db.products.insert_many([
+        _product(pid_a, "va", stock),
+        _product(pid_b, "vb", stock_b),
+    ])
+
+    items = [
+        {"productId": pid_a, "variantId": "va", "quantity": quantity},
+        {"productId": pid_b, "variantId": "vb", "quantity": quantity},
+    ]
+
+    sem = asyncio.Semaphore(concurrency)
+    outcomes = {"ok": 0, "rejected": 0}
+
+    async def attempt():
+        async with sem:
+            try:
+                await server._reserve_inventory(items)
+                outcomes["ok"] += 1
+            except HTTPException:
+                outcomes["rejected"] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(attempt() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+
+    final_a = await _stock(pid_a)
+    final_b = await _stock(pid_b)
+    sold = outcomes["ok"] * quantity
+
+    await server.db.products.delete_many({"id": {"$in": [pid_a, pid_b]}})
+
+    print(f"database:        {bench_db_name}")
+    print(f"attempts:        {requests} at concurrency {concurrency} ({requests / elapsed:.0f} req/s)")
+    print(f"accepted:        {outcomes['ok']}  rejected: {outcomes['rejected']}")
+    print(f"product A stock: {stock} -> {final_a} (expected {stock - sold})")
+    print(f"product B stock: {stock_b} -> {final_b} (expected {stock_b - sold})")
+
+    oversold = sold > stock_b or final_a != stock - sold or final_b != stock_b - sold or min(final_a, final_b) < 0
+    print("RESULT:          " + ("OVERSOLD" if oversold else "no overselling"))
+    return 1 if oversold else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent inventory reservation benchmark")
+    parser.add_argument("--stock", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--quantity", type=int, default=1)
+    args = parser.parse_args()
+
+    raise SystemExit(asyncio.run(main(args.stock, args.requests, args.concurrency, args.quantity)))
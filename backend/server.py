@@ -12,19 +12,34 @@ from fastapi import (
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import IndexModel, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 from pathlib import Path
 from cloudinary.utils import cloudinary_url
 from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel, Field
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
 from bson import ObjectId
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple, AsyncIterator
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone, timedelta
 import os
 import logging
 import cloudinary
 import cloudinary.uploader
 import uuid
+import asyncio
+import bcrypt
 import hashlib
+import hmac
+import secrets
+import time
+import base64
+import codecs
+import csv
+import io
+import json
 import re
 
 
@@ -57,6 +72,104 @@ def _hash_pw(pw: str) -> str:
     return hashlib.sha256((pw or "").encode("utf-8")).hexdigest()
 
 
+PASSWORD_BCRYPT_ROUNDS = int(os.environ.get("PASSWORD_BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", "2"))
+LOGIN_MAX_ATTEMPTS = int(os.environ.get("LOGIN_MAX_ATTEMPTS", "5"))
+LOGIN_ATTEMPT_WINDOW = float(os.environ.get("LOGIN_ATTEMPT_WINDOW", "300"))
+# proxies in front of the API that append to X-Forwarded-For; 0 when exposed directly
+TRUSTED_PROXY_HOPS = int(os.environ.get("TRUSTED_PROXY_HOPS", "1"))
+
+
+class _PasswordService:
+    # bcrypt runs on a small dedicated pool so a login never blocks the event
+    # loop and a burst of logins can only ever occupy `workers` cores
+    def __init__(self, rounds: int, workers: int):
+        self.rounds = rounds
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="pwhash")
+
+    @staticmethod
+    def _secret(pw: str) -> bytes:
+        return (pw or "").encode("utf-8")[:72]
+
+    async def _run(self, fn: Any, *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+
+    async def hash(self, pw: str) -> str:
+        hashed = await self._run(bcrypt.hashpw, self._secret(pw), bcrypt.gensalt(self.rounds))
+        return hashed.decode("ascii")
+
+    async def verify(self, pw: str, stored: str) -> Tuple[bool, bool]:
+        stored = str(stored or "")
+        if stored.startswith("$2"):
+            ok = await self._run(bcrypt.checkpw, self._secret(pw), stored.encode("ascii"))
+            try:
+                rounds = int(stored.split("$")[2])
+            except (IndexError, ValueError):
+                rounds = 0
+            return ok, ok and rounds < self.rounds
+
+        # legacy unsalted SHA-256; callers re-hash on success
+        ok = hmac.compare_digest(_hash_pw(pw), stored)
+        return ok, ok
+
+
+class _AttemptThrottle:
+    def __init__(self, max_attempts: int, window_seconds: float, max_keys: int = 10000):
+        self.max_attempts = max_attempts
+        self.window_seconds = window_seconds
+        self.max_keys = max_keys
+        self._attempts: "OrderedDict[str, deque]" = OrderedDict()
+
+    def _recent(self, key: str) -> deque:
+        attempts = self._attempts.get(key)
+        if attempts is None:
+            return deque()
+        cutoff = time.monotonic() - self.window_seconds
+        while attempts and attempts[0] < cutoff:
+            attempts.popleft()
+        if not attempts:
+            del self._attempts[key]
+        return attempts
+
+    def hit(self, key: str) -> None:
+        # check and record in one step with no await in between, so concurrent
+        # attempts from one address cannot all pass before any is counted
+        attempts = self._recent(key)
+        if len(attempts) >= self.max_attempts:
+            retry_after = int(attempts[0] + self.window_seconds - time.monotonic()) + 1
+            raise HTTPException(
+                status_code=429,
+                detail="Too many attempts. Try again later.",
+                headers={"Retry-After": str(max(1, retry_after))},
+            )
+
+        attempts = self._attempts.setdefault(key, attempts)
+        attempts.append(time.monotonic())
+        self._attempts.move_to_end(key)
+        while len(self._attempts) > self.max_keys:
+            self._attempts.popitem(last=False)
+
+    def reset(self, key: str) -> None:
+        self._attempts.pop(key, None)
+
+
+password_service = _PasswordService(PASSWORD_BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS)
+login_throttle = _AttemptThrottle(LOGIN_MAX_ATTEMPTS, LOGIN_ATTEMPT_WINDOW)
+
+
+def _client_ip(request: Request) -> str:
+    peer = request.client.host if request.client else "unknown"
+    if TRUSTED_PROXY_HOPS <= 0:
+        return peer
+
+    # each trusted proxy appends the address it saw, so the client is the entry
+    # TRUSTED_PROXY_HOPS from the right; anything further left is caller-supplied
+    forwarded = [h.strip() for h in request.headers.get("x-forwarded-for", "").split(",") if h.strip()]
+    if len(forwarded) < TRUSTED_PROXY_HOPS:
+        return peer
+    return forwarded[-TRUSTED_PROXY_HOPS]
+
+
 def _is_strong_password(pw: str) -> bool:
     return isinstance(pw, str) and len(pw.strip()) >= 10
 
@@ -66,6 +179,45 @@ def _phone_key(p: str) -> str:
     return digits[-9:] if len(digits) >= 9 else digits
 
 
+def _order_number_key(order_number: Any) -> str:
+    return str(order_number or "").strip().upper()
+
+
+# mirrors what _public_order_view keeps so the rest never leaves the database
+PUBLIC_ORDER_PROJECTION: Dict[str, Any] = {
+    "_id": 0,
+    "id": 1,
+    "orderNumber": 1,
+    "customer": 1,
+    "items": 1,
+    "subtotal": 1,
+    "giftWrapTotal": 1,
+    "discount": 1,
+    "shippingCost": 1,
+    "total": 1,
+    "status": 1,
+    "courier": 1,
+    "trackingUrl": 1,
+    "packageWeight": 1,
+    "createdAt": 1,
+    "updatedAt": 1,
+    "delivery.city": 1,
+    "delivery.county": 1,
+    "delivery.method": 1,
+    "delivery.cost": 1,
+    "delivery.trackingNumber": 1,
+    "payment.method": 1,
+    "payment.status": 1,
+    "payment.confirmedAt": 1,
+    "statusHistory.status": 1,
+    "statusHistory.note": 1,
+    "statusHistory.at": 1,
+    "statusHistory.timestamp": 1,
+    "statusHistory.time": 1,
+    "statusHistory.createdAt": 1,
+}
+
+
 def _public_order_view(order: Dict[str, Any]) -> Dict[str, Any]:
     if not order:
         return {}
@@ -100,6 +252,387 @@ def _public_order_view(order: Dict[str, Any]) -> Dict[str, Any]:
     return o
 
 
+# ==================== SEARCH HELPERS ====================
+
+PRODUCT_TEXT_INDEX = "products_text_search"
+PRODUCT_TEXT_WEIGHTS = {
+    "name": 10,
+    "tags": 6,
+    "shortDescription": 3,
+    "longDescription": 1,
+}
+
+# spelling variants customers actually type; the english stemmer handles plurals
+_SEARCH_TERM_ALIASES: Dict[str, List[str]] = {
+    "jewelry": ["jewellery"],
+    "jewellery": ["jewelry"],
+    "jewelery": ["jewellery", "jewelry"],
+    "earing": ["earring"],
+    "earings": ["earrings"],
+    "neckless": ["necklace"],
+    "necklase": ["necklace"],
+    "braclet": ["bracelet"],
+    "bracelette": ["bracelet"],
+    "bangel": ["bangle"],
+    "pendent": ["pendant"],
+}
+
+
+def _text_search_terms(search: str) -> str:
+    tokens = re.findall(r"\w+", str(search or "").casefold())
+
+    terms: List[str] = []
+    for token in tokens:
+        for term in [token, *_SEARCH_TERM_ALIASES.get(token, [])]:
+            if term not in terms:
+                terms.append(term)
+
+    return " ".join(terms)
+
+
+# ==================== PAGINATION HELPERS ====================
+
+def _encode_cursor(sort_key: str, value: Any, last_id: Any) -> str:
+    raw = json.dumps({"s": sort_key, "v": value, "id": last_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str, sort_key: str) -> Dict[str, Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if not isinstance(data, dict) or "v" not in data or "id" not in data:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if data.get("s") != sort_key:
+        raise HTTPException(status_code=400, detail="Cursor does not match the requested sort")
+    return data
+
+
+def _with_keyset(query: Dict[str, Any], field: str, direction: int, cursor_doc: Dict[str, Any]) -> Dict[str, Any]:
+    op = "$gt" if direction == 1 else "$lt"
+    keyset = {
+        "$or": [
+            {field: {op: cursor_doc["v"]}},
+            {field: cursor_doc["v"], "id": {op: cursor_doc["id"]}},
+        ]
+    }
+    if "$or" in query:
+        return {"$and": [query, keyset]}
+    return {**query, **keyset}
+
+
+# ==================== FACET HELPERS ====================
+
+PRODUCT_FACETS = ("category", "collections", "price", "isNewArrival", "isFeatured", "isBestseller")
+PRICE_FACET_BOUNDARIES = [0, 5000, 10000, 25000, 50000, 100000]
+
+
+def _parse_facets(raw: Optional[str]) -> List[str]:
+    names: List[str] = []
+    for name in str(raw or "").split(","):
+        name = name.strip()
+        if not name or name in names:
+            continue
+        if name not in PRODUCT_FACETS:
+            raise HTTPException(status_code=400, detail=f"Unknown facet: {name}")
+        names.append(name)
+    return names
+
+
+def _facet_branch(name: str, others: Dict[str, Any]) -> List[Dict[str, Any]]:
+    stages: List[Dict[str, Any]] = [{"$match": others}] if others else []
+
+    if name == "category":
+        stages += [
+            {"$group": {"_id": "$category", "count": {"$sum": 1}}},
+            {"$sort": {"count": -1, "_id": 1}},
+        ]
+    elif name == "collections":
+        stages += [
+            {"$unwind": "$collections"},
+            {"$group": {"_id": "$collections", "count": {"$sum": 1}}},
+            {"$sort": {"count": -1, "_id": 1}},
+        ]
+    elif name == "price":
+        stages += [
+            {
+                "$bucket": {
+                    "groupBy": "$basePrice",
+                    "boundaries": PRICE_FACET_BOUNDARIES + [float("inf")],
+                    "default": "other",
+                    "output": {"count": {"$sum": 1}},
+                }
+            }
+        ]
+    else:
+        stages += [{"$group": {"_id": {"$eq": [f"${name}", True]}, "count": {"$sum": 1}}}]
+
+    return stages
+
+
+def _format_facet(name: str, rows: List[Dict[str, Any]]) -> Any:
+    if name == "price":
+        upper = {b: (PRICE_FACET_BOUNDARIES[i + 1] if i + 1 < len(PRICE_FACET_BOUNDARIES) else None)
+                 for i, b in enumerate(PRICE_FACET_BOUNDARIES)}
+        return [
+            {"min": r["_id"], "max": upper.get(r["_id"]), "count": r["count"]}
+            for r in rows
+            if r.get("_id") in upper
+        ]
+
+    if name in ("category", "collections"):
+        return [
+            {"value": r["_id"], "count": r["count"]}
+            for r in rows
+            if str(r.get("_id") or "").strip()
+        ]
+
+    counts = {bool(r.get("_id")): r["count"] for r in rows}
+    return {"true": counts.get(True, 0), "false": counts.get(False, 0)}
+
+
+# ==================== PROJECTION HELPERS ====================
+
+PRODUCT_CARD_FIELDS = (
+    "id",
+    "name",
+    "slug",
+    "category",
+    "collections",
+    "shortDescription",
+    "basePrice",
+    "salePrice",
+    "discountPercentage",
+    "images",
+    "primaryImage",
+    "modelImage",
+    "variants",
+    "status",
+    "isFeatured",
+    "isBestseller",
+    "isNewArrival",
+    "allowPreorder",
+    "averageRating",
+    "reviewCount",
+    "totalPurchases",
+    "createdAt",
+)
+
+
+PRODUCT_FIELD_VIEWS: Dict[str, Tuple[str, ...]] = {
+    "card": PRODUCT_CARD_FIELDS,
+    "cart": PRODUCT_CARD_FIELDS + ("giftWrapAvailable", "giftWrapCost"),
+}
+
+
+def _product_projection(fields: Optional[str], *required: str) -> Dict[str, Any]:
+    raw = str(fields or "card").strip()
+    if raw == "full":
+        return {"_id": 0}
+
+    names: List[str] = []
+    for name in (f.strip() for f in raw.split(",")):
+        if name in PRODUCT_FIELD_VIEWS:
+            names.extend(PRODUCT_FIELD_VIEWS[name])
+        elif name:
+            names.append(name)
+
+    unknown = [f for f in names if f not in Product.model_fields]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown product fields: {', '.join(unknown)}")
+
+    projection: Dict[str, Any] = {"_id": 0}
+    for name in [*names, "id", *required]:
+        projection[name] = 1
+    return projection
+
+
+# ==================== CURRENCY HELPERS ====================
+
+BASE_CURRENCY = "KES"
+PRODUCT_PRICE_FIELDS = ("basePrice", "salePrice", "giftWrapCost")
+
+
+async def _currency_conversion(currency: Optional[str]) -> Optional[Tuple[str, float]]:
+    code = str(currency or "").strip().upper()
+    if not code:
+        return None
+
+    rates = (await settings_cache.get()).get("currencyRates") or {}
+    rate = rates.get(code, 1.0 if code == BASE_CURRENCY else None)
+    try:
+        rate = float(rate)
+    except (TypeError, ValueError):
+        rate = 0.0
+    if rate <= 0:
+        raise HTTPException(status_code=400, detail=f"Unsupported currency: {code}")
+    return code, rate
+
+
+def _convert_price(value: Any, rate: float, digits: int) -> Any:
+    if type(value) not in (int, float):
+        return value
+    return round(value * rate, digits)
+
+
+def _convert_products(products: List[Dict[str, Any]], conversion: Optional[Tuple[str, float]]) -> List[Dict[str, Any]]:
+    if not conversion:
+        return products
+
+    code, rate = conversion
+    digits = 0 if code == BASE_CURRENCY else 2
+
+    # copies, so cached base-currency documents are never rewritten
+    converted = []
+    for product in products:
+        product = dict(product)
+        for field in PRODUCT_PRICE_FIELDS:
+            if field in product:
+                product[field] = _convert_price(product[field], rate, digits)
+        if isinstance(product.get("variants"), list):
+            product["variants"] = [
+                {**v, "priceAdjustment": _convert_price(v.get("priceAdjustment"), rate, digits)}
+                if isinstance(v, dict) and "priceAdjustment" in v else v
+                for v in product["variants"]
+            ]
+        product["currency"] = code
+        converted.append(product)
+    return converted
+
+
+# ==================== EXPORT HELPERS ====================
+
+EXPORT_BATCH_SIZE = 500
+
+
+def _get_path(doc: Dict[str, Any], path: str) -> Any:
+    value: Any = doc
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def _export_cell(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, list) and all(not isinstance(v, (dict, list)) for v in value):
+        return "|".join(str(v) for v in value)
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str)
+    return value
+
+
+async def _stream_export(cursor: Any, fmt: str, columns: List[str]) -> AsyncIterator[str]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    if fmt == "csv":
+        writer.writerow(columns)
+
+    pending = 0
+    async for doc in cursor:
+        doc.pop("_id", None)
+        if fmt == "csv":
+            writer.writerow([_export_cell(_get_path(doc, c)) for c in columns])
+        else:
+            buf.write(json.dumps(doc, default=str))
+            buf.write("\n")
+
+        pending += 1
+        if pending >= EXPORT_BATCH_SIZE:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate(0)
+            pending = 0
+
+    if buf.tell():
+        yield buf.getvalue()
+
+
+def _export_response(body: AsyncIterator[str], fmt: str, name: str) -> StreamingResponse:
+    return StreamingResponse(
+        body,
+        media_type="text/csv" if fmt == "csv" else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{name}.{fmt}"'},
+    )
+
+
+# ==================== RESPONSE CACHE ====================
+
+class _ResponseCache:
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[Any, ...], Tuple[float, Any]]" = OrderedDict()
+
+    def key(self, name: str, **params: Any) -> Tuple[Any, ...]:
+        # the generation is captured before the DB read, so a response computed
+        # across a bump() is stored under a key nobody will ask for again
+        return (self.generation, name, tuple(sorted(params.items())))
+
+    def get(self, key: Tuple[Any, ...]) -> Any:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Tuple[Any, ...], value: Any) -> None:
+        if key[0] != self.generation:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def bump(self) -> None:
+        self.generation += 1
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "generation": self.generation,
+            "entries": len(self._entries),
+            "maxEntries": self.max_entries,
+            "ttlSeconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Per-worker cache for storefront catalog reads. Admin writes handled by this
+# worker bump the generation; the TTL bounds staleness on other workers.
+catalog_cache = _ResponseCache(
+    max_entries=int(os.environ.get("CATALOG_CACHE_SIZE", "512")),
+    ttl_seconds=float(os.environ.get("CATALOG_CACHE_TTL", "60")),
+)
+
+
+def _content_digest(value: Any) -> str:
+    return hashlib.sha1(json.dumps(value, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def _etag_response(request: Request, body: Any, etag: str, headers: Optional[Dict[str, str]] = None) -> Response:
+    headers = {"ETag": etag, "Cache-Control": "no-cache", **(headers or {})}
+    if etag in [t.strip() for t in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(body, headers=headers)
+
+
 def _normalize_image_roles(images: List[str], primary_image: Optional[str], model_image: Optional[str]) -> Dict[str, Optional[str]]:
     safe_images = images or []
     primary = (primary_image or "").strip()
@@ -119,6 +652,45 @@ def _normalize_image_roles(images: List[str], primary_image: Optional[str], mode
     }
 
 
+def _normalize_product_dict(product_dict: Dict[str, Any]) -> Dict[str, Any]:
+    product_dict["categorySlug"] = _slugify_text(product_dict.get("category")) or None
+    product_dict["images"] = product_dict.get("images") or []
+    product_dict["tags"] = product_dict.get("tags") or []
+    product_dict["collections"] = product_dict.get("collections") or []
+    product_dict["relatedProductIds"] = product_dict.get("relatedProductIds") or []
+    product_dict["bundleProductIds"] = product_dict.get("bundleProductIds") or []
+
+    image_roles = _normalize_image_roles(
+        images=product_dict["images"],
+        primary_image=product_dict.get("primaryImage"),
+        model_image=product_dict.get("modelImage"),
+    )
+    product_dict["primaryImage"] = image_roles["primaryImage"]
+    product_dict["modelImage"] = image_roles["modelImage"]
+
+    clean_variants = []
+    for v in (product_dict.get("variants") or []):
+        sku = str(v.get("sku") or "").strip()
+        if not sku:
+            raise HTTPException(status_code=400, detail="Each variant must have an SKU")
+
+        variant_id = str(v.get("id") or "").strip() or str(uuid.uuid4())
+
+        clean_variants.append({
+            "id": variant_id,
+            "size": (v.get("size") or None),
+            "color": (v.get("color") or None),
+            "material": (v.get("material") or None),
+            "stock": int(v.get("stock") or 0),
+            "sku": sku,
+            "priceAdjustment": float(v.get("priceAdjustment") or 0.0),
+        })
+
+    product_dict["variants"] = clean_variants
+
+    return product_dict
+
+
 async def _get_active_category_by_slug(slug: str) -> Optional[Dict[str, Any]]:
     if not slug:
         return None
@@ -128,82 +700,142 @@ async def _get_active_category_by_slug(slug: str) -> Optional[Dict[str, Any]]:
     )
 
 
-async def _resolve_page_products(page_doc: Dict[str, Any], limit: int = 100) -> List[Dict[str, Any]]:
-    if not page_doc:
-        return []
+def _count_group_stages(field: str) -> List[Dict[str, Any]]:
+    stages: List[Dict[str, Any]] = []
+    if field == "collections":
+        stages.append({"$unwind": "$collections"})
+    stages.append({"$group": {"_id": f"${field}", "count": {"$sum": 1}}})
+    return stages
+
+
+def _count_rows(rows: List[Dict[str, Any]]) -> Dict[str, int]:
+    return {r["_id"]: r["count"] for r in rows if isinstance(r.get("_id"), str)}
+
+
+def _category_product_query(slug: str, category_name: Optional[str] = None) -> Dict[str, Any]:
+    # products are keyed by the slugified category name, which may differ from a
+    # record's custom slug; the slug itself is only the key when no record exists
+    key = _slugify_text(category_name) if category_name else ""
+    return {"categorySlug": key or slug, "status": "active"}
+
 
-    page_type = str(page_doc.get("type") or "manual").strip().lower()
+PAGE_TYPE_FILTERS: Dict[str, Tuple[Dict[str, Any], str]] = {
+    "featured": ({"isFeatured": True}, "createdAt"),
+    "new_arrivals": ({"isNewArrival": True}, "createdAt"),
+    "bestsellers": ({"isBestseller": True}, "totalPurchases"),
+    "discounted": ({"salePrice": {"$ne": None}}, "createdAt"),
+}
+
+
+def _page_type(page_doc: Dict[str, Any]) -> str:
+    return str(page_doc.get("type") or "manual").strip().lower()
+
+
+def _page_product_query(
+    page_doc: Dict[str, Any],
+    category_name: Optional[str] = None,
+) -> Optional[Tuple[Dict[str, Any], Optional[str]]]:
+    page_type = _page_type(page_doc)
 
     if page_type == "manual":
         product_ids = [str(x).strip() for x in (page_doc.get("productIds") or []) if str(x).strip()]
         if not product_ids:
-            return []
-
-        products = await db.products.find(
-            {"id": {"$in": product_ids}, "status": "active"},
-            {"_id": 0},
-        ).to_list(limit)
-
-        order_map = {pid: i for i, pid in enumerate(product_ids)}
-        products.sort(key=lambda p: order_map.get(p.get("id"), 10**9))
-        return products
+            return None
+        return {"id": {"$in": product_ids}, "status": "active"}, None
 
     if page_type == "category":
         category_slug = str(page_doc.get("categorySlug") or "").strip()
         if not category_slug:
-            return []
+            return None
+        return _category_product_query(category_slug, category_name), "createdAt"
+
+    if page_type in PAGE_TYPE_FILTERS:
+        query, sort_field = PAGE_TYPE_FILTERS[page_type]
+        return {**query, "status": "active"}, sort_field
+
+    return None
+
+
+async def _resolve_page_products(
+    page_doc: Dict[str, Any],
+    limit: int = 100,
+    projection: Optional[Dict[str, Any]] = None,
+) -> List[Dict[str, Any]]:
+    if not page_doc:
+        return []
 
-        category_doc = await _get_active_category_by_slug(category_slug)
+    projection = projection or {"_id": 0}
 
+    page_type = _page_type(page_doc)
+
+    category_name = None
+    if page_type == "category":
+        category_doc = await _get_active_category_by_slug(str(page_doc.get("categorySlug") or "").strip())
         if category_doc:
             category_name = str(category_doc.get("name") or "").strip()
-            return await db.products.find(
-                {"category": category_name, "status": "active"},
-                {"_id": 0},
-            ).sort("createdAt", -1).to_list(limit)
-
-        # fallback if category record is missing but products still exist
-        all_products = await db.products.find(
-            {"status": "active"},
-            {"_id": 0},
-        ).to_list(1000)
-
-        matched = []
-        for product in all_products:
-            product_category = str(product.get("category") or "").strip()
-            if not product_category:
-                continue
-            if _slugify_text(product_category) == category_slug:
-                matched.append(product)
-
-        matched.sort(key=lambda p: str(p.get("createdAt") or ""), reverse=True)
-        return matched[:limit]
-
-    if page_type == "featured":
-        return await db.products.find(
-            {"isFeatured": True, "status": "active"},
-            {"_id": 0},
-        ).sort("createdAt", -1).to_list(limit)
-
-    if page_type == "new_arrivals":
-        return await db.products.find(
-            {"isNewArrival": True, "status": "active"},
-            {"_id": 0},
-        ).sort("createdAt", -1).to_list(limit)
-
-    if page_type == "bestsellers":
-        return await db.products.find(
-            {"isBestseller": True, "status": "active"},
-            {"_id": 0},
-        ).sort("totalPurchases", -1).to_list(limit)
-
-    if page_type == "discounted":
-        return await db.products.find(
-            {"salePrice": {"$ne": None}, "status": "active"},
-            {"_id": 0},
-        ).sort("createdAt", -1).to_list(limit)
-
-    return []
+
+    spec = _page_product_query(page_doc, category_name)
+    if not spec:
+        return []
+
+    query, sort_field = spec
+    cursor = db.products.find(query, projection)
+    if sort_field:
+        cursor = cursor.sort(sort_field, -1)
+    products = await cursor.to_list(limit)
+
+    if page_type == "manual":
+        order_map = {pid: i for i, pid in enumerate(page_doc.get("productIds") or [])}
+        products.sort(key=lambda p: order_map.get(p.get("id"), 10**9))
+    return products
+
+
+PAGE_RESOLVE_CONCURRENCY = int(os.environ.get("PAGE_RESOLVE_CONCURRENCY", "8"))
+
+
+async def _count_page_products(page_doc: Dict[str, Any], category_name: Optional[str] = None) -> int:
+    spec = _page_product_query(page_doc, category_name)
+    if not spec:
+        return 0
+    return await db.products.count_documents(spec[0])
+
+
+async def _gather_bounded(coros: List[Any], limit: int = PAGE_RESOLVE_CONCURRENCY) -> List[Any]:
+    # caps how many pool connections a single request can hold at once
+    sem = asyncio.Semaphore(max(1, limit))
+
+    async def run(coro: Any) -> Any:
+        async with sem:
+            return await coro
+
+    return await asyncio.gather(*(run(c) for c in coros))
+
+
+async def _navigation_counts(
+    pages: List[Dict[str, Any]],
+    category_names: Dict[str, str],
+) -> Tuple[Dict[str, int], Dict[str, int], List[int]]:
+    async def group_counts() -> Dict[str, Any]:
+        rows = await db.products.aggregate([
+            {"$match": {"status": "active"}},
+            {"$facet": {
+                "category": _count_group_stages("category"),
+                "collections": _count_group_stages("collections"),
+            }},
+        ]).to_list(1)
+        return rows[0] if rows else {}
+
+    # page counts are separate count_documents calls so each one can use its
+    # own index; $facet branches only ever scan
+    page_count_coros = [
+        _count_page_products(p, category_names.get(str(p.get("categorySlug") or "").strip()))
+        for p in pages
+    ]
+    result, page_counts = await asyncio.gather(group_counts(), _gather_bounded(page_count_coros))
+
+    category_counts = _count_rows(result.get("category") or [])
+    collection_counts = _count_rows(result.get("collections") or [])
+    return category_counts, collection_counts, list(page_counts)
 
 # ==================== DB ====================
 
@@ -219,6 +851,322 @@ client = AsyncIOMotorClient(mongo_url)
 db = client[db_name]
 
 
+# ==================== INDEXES ====================
+
+INDEX_REGISTRY: Dict[str, List[IndexModel]] = {
+    "products": [
+        IndexModel([("id", 1)], name="id_unique", unique=True),
+        IndexModel([("slug", 1)], name="slug_unique", unique=True),
+        IndexModel([("status", 1), ("createdAt", -1), ("id", -1)], name="status_createdAt"),
+        IndexModel([("status", 1), ("category", 1), ("createdAt", -1)], name="status_category_createdAt"),
+        IndexModel(
+            [("categorySlug", 1), ("status", 1), ("createdAt", -1)],
+            name="categorySlug_status_createdAt",
+        ),
+        IndexModel([("status", 1), ("collections", 1), ("createdAt", -1)], name="status_collections_createdAt"),
+        IndexModel([("status", 1), ("isFeatured", 1), ("createdAt", -1)], name="status_featured_createdAt"),
+        IndexModel([("status", 1), ("isNewArrival", 1), ("createdAt", -1)], name="status_newArrival_createdAt"),
+        IndexModel([("status", 1), ("isBestseller", 1), ("totalPurchases", -1)], name="status_bestseller_purchases"),
+        IndexModel([("status", 1), ("totalPurchases", -1)], name="status_totalPurchases"),
+        IndexModel([("status", 1), ("basePrice", 1), ("id", 1)], name="status_basePrice"),
+        IndexModel([("status", 1), ("name", 1), ("id", 1)], name="status_name"),
+        IndexModel(
+            [(field, "text") for field in PRODUCT_TEXT_WEIGHTS],
+            name=PRODUCT_TEXT_INDEX,
+            weights=PRODUCT_TEXT_WEIGHTS,
+            default_language="english",
+        ),
+    ],
+    "orders": [
+        IndexModel([("id", 1)], name="id_unique", unique=True, sparse=True),
+        IndexModel([("orderNumber", 1)], name="orderNumber_unique", unique=True, sparse=True),
+        IndexModel([("orderNumberKey", 1)], name="orderNumberKey_unique", unique=True, sparse=True),
+        IndexModel([("createdAt", -1), ("id", -1)], name="createdAt"),
+        IndexModel([("payment.status", 1), ("createdAt", -1)], name="paymentStatus_createdAt"),
+        IndexModel(
+            [("reservation.status", 1), ("reservation.expiresAt", 1)],
+            name="reservation_status_expiresAt",
+            partialFilterExpression={"reservation.status": "held"},
+        ),
+    ],
+    "reviews": [
+        IndexModel([("id", 1)], name="id_unique", unique=True),
+        IndexModel(
+            [("productId", 1), ("status", 1), ("createdAt", -1), ("id", -1)],
+            name="productId_status_createdAt_id",
+        ),
+        IndexModel([("status", 1), ("createdAt", -1), ("id", -1)], name="status_createdAt_id"),
+    ],
+    "admin_revocations": [
+        IndexModel([("sid", 1)], name="sid_unique", unique=True),
+        IndexModel([("expiresAt", 1)], name="expiresAt_ttl", expireAfterSeconds=0),
+    ],
+    "categories": [
+        IndexModel([("id", 1)], name="id_unique", unique=True),
+        IndexModel([("slug", 1)], name="slug_unique", unique=True),
+        IndexModel([("active", 1), ("displayOrder", 1)], name="active_displayOrder"),
+    ],
+    "pages": [
+        IndexModel([("id", 1)], name="id_unique", unique=True),
+        IndexModel([("slug", 1)], name="slug_unique", unique=True),
+        IndexModel([("active", 1), ("displayOrder", 1)], name="active_displayOrder"),
+    ],
+    "collections": [
+        IndexModel([("id", 1)], name="id_unique", unique=True),
+        IndexModel([("displayOrder", 1)], name="displayOrder"),
+    ],
+    "admin": [
+        IndexModel([("key", 1)], name="key_unique", unique=True),
+    ],
+}
+
+
+async def _apply_index_registry() -> Dict[str, Any]:
+    created: List[str] = []
+    failed: List[Dict[str, str]] = []
+
+    for coll_name, models in INDEX_REGISTRY.items():
+        for model in models:
+            name = model.document["name"]
+            try:
+                # create_indexes is a no-op when an identical index already exists
+                await db[coll_name].create_indexes([model])
+                created.append(f"{coll_name}.{name}")
+            except Exception as e:
+                logger.warning("Could not create index %s.%s: %s", coll_name, name, e)
+                failed.append({"index": f"{coll_name}.{name}", "error": str(e)})
+
+    return {"applied": created, "failed": failed}
+
+
+async def _run_backfills() -> None:
+    # derived fields must exist before the unique indexes over them are built
+    result = await db.orders.update_many(
+        {"orderNumberKey": {"$exists": False}, "orderNumber": {"$type": "string"}},
+        [{"$set": {"orderNumberKey": {"$toUpper": {"$trim": {"input": "$orderNumber"}}}}}],
+    )
+    if result.modified_count:
+        logger.info("Backfilled orderNumberKey on %d orders", result.modified_count)
+
+    backfilled = 0
+    ops: List[UpdateOne] = []
+    async for doc in db.products.find({"categorySlug": {"$exists": False}}, {"_id": 1, "category": 1}):
+        ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"categorySlug": _slugify_text(doc.get("category")) or None}}))
+        if len(ops) >= PRODUCT_IMPORT_BATCH_SIZE:
+            backfilled += (await db.products.bulk_write(ops, ordered=False)).modified_count
+            ops = []
+    if ops:
+        backfilled += (await db.products.bulk_write(ops, ordered=False)).modified_count
+    if backfilled:
+        logger.info("Backfilled categorySlug on %d products", backfilled)
+
+    if await db.products.count_documents({"ratingStats": {"$exists": False}}, limit=1):
+        rebuilt = await _rebuild_rating_stats()
+        logger.info("Rebuilt rating stats for %d products", rebuilt)
+
+
+async def _index_report() -> List[Dict[str, Any]]:
+    report = []
+
+    for coll_name, models in INDEX_REGISTRY.items():
+        coll = db[coll_name]
+        declared = [m.document["name"] for m in models]
+
+        existing = await coll.index_information()
+        stats = await coll.aggregate([{"$indexStats": {}}]).to_list(None)
+        usage = {
+            s.get("name"): {
+                "ops": int((s.get("accesses") or {}).get("ops") or 0),
+                "since": (s.get("accesses") or {}).get("since"),
+            }
+            for s in stats
+        }
+
+        report.append({
+            "collection": coll_name,
+            "missing": [n for n in declared if n not in existing],
+            "undeclared": [n for n in existing if n != "_id_" and n not in declared],
+            "unused": [n for n in existing if n != "_id_" and usage.get(n, {}).get("ops", 0) == 0],
+            "usage": usage,
+        })
+
+    return report
+
+
+# ==================== COUNTER BUFFERS ====================
+
+class _CounterBuffer:
+    def __init__(self, collection_name: str, field: str, flush_interval: float, max_pending: int):
+        self.collection_name = collection_name
+        self.field = field
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending: Dict[str, int] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._inflight: Optional[asyncio.Task] = None
+        self._flushing = False
+
+    def add(self, key: str, amount: int = 1) -> None:
+        self._pending[key] = self._pending.get(key, 0) + amount
+        if len(self._pending) >= self.max_pending and not self._flushing:
+            # held so the task is not collected mid-write and stop() can wait for it
+            self._inflight = asyncio.get_running_loop().create_task(self.flush())
+
+    def pending(self, key: str) -> int:
+        return self._pending.get(key, 0)
+
+    async def flush(self) -> int:
+        if self._flushing or not self._pending:
+            return 0
+
+        self._flushing = True
+        batch, self._pending = self._pending, {}
+        try:
+            await db[self.collection_name].bulk_write(
+                [UpdateOne({"id": key}, {"$inc": {self.field: amount}}) for key, amount in batch.items()],
+                ordered=False,
+            )
+            return len(batch)
+        except (Exception, asyncio.CancelledError) as e:
+            # keep the counts for the next flush rather than dropping them; a
+            # flush cancelled by stop() is retried by the final flush there
+            for key, amount in batch.items():
+                self._pending[key] = self._pending.get(key, 0) + amount
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            logger.warning("Could not flush %s.%s increments: %s", self.collection_name, self.field, e)
+            return 0
+        finally:
+            self._flushing = False
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._inflight is not None:
+            # a threshold flush still writing would make the final flush a no-op
+            await self._inflight
+            self._inflight = None
+        await self.flush()
+
+
+view_counter = _CounterBuffer(
+    "products",
+    "viewCount",
+    flush_interval=float(os.environ.get("VIEW_FLUSH_INTERVAL", "10")),
+    max_pending=int(os.environ.get("VIEW_FLUSH_THRESHOLD", "500")),
+)
+
+
+class _EventBuffer:
+    # Bounded in-process queue drained by one writer task with insert_many.
+    # A full queue rejects new events instead of slowing down the request.
+    def __init__(self, collection_name: str, batch_size: int, flush_interval: float, max_queue: int):
+        self.collection_name = collection_name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(maxsize=max_queue)
+        self._task: Optional[asyncio.Task] = None
+        # events taken off the queue but not yet written; stop() writes them
+        self._batch: List[Dict[str, Any]] = []
+        self.accepted = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+
+    def offer(self, docs: List[Dict[str, Any]]) -> int:
+        accepted = 0
+        for doc in docs:
+            try:
+                self._queue.put_nowait(doc)
+            except asyncio.QueueFull:
+                break
+            accepted += 1
+        self.accepted += accepted
+        self.dropped += len(docs) - accepted
+        return accepted
+
+    def _drain(self, batch: List[Dict[str, Any]]) -> None:
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                return
+
+    async def _write(self, batch: List[Dict[str, Any]]) -> None:
+        try:
+            await db[self.collection_name].insert_many(batch, ordered=False)
+            self.written += len(batch)
+        except BulkWriteError as e:
+            failed = len(e.details.get("writeErrors") or [])
+            self.written += len(batch) - failed
+            self.failed += failed
+        except Exception as e:
+            logger.warning("Event flush to %s failed: %s", self.collection_name, e)
+            self.failed += len(batch)
+
+    async def _run(self) -> None:
+        while True:
+            self._batch = [await self._queue.get()]
+            self._drain(self._batch)
+            if len(self._batch) < self.batch_size:
+                # let a partial batch fill up for one interval before writing it
+                await asyncio.sleep(self.flush_interval)
+                self._drain(self._batch)
+            await self._write(self._batch)
+            self._batch = []
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        batch, self._batch = self._batch, []
+        while batch or not self._queue.empty():
+            self._drain(batch)
+            await self._write(batch)
+            batch = []
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self._queue.qsize(),
+            "maxQueue": self._queue.maxsize,
+            "accepted": self.accepted,
+            "dropped": self.dropped,
+            "written": self.written,
+            "failed": self.failed,
+        }
+
+
+analytics_buffer = _EventBuffer(
+    "analytics",
+    batch_size=int(os.environ.get("ANALYTICS_BATCH_SIZE", "1000")),
+    flush_interval=float(os.environ.get("ANALYTICS_FLUSH_INTERVAL", "1")),
+    max_queue=int(os.environ.get("ANALYTICS_MAX_QUEUE", "50000")),
+)
+
+
 # ==================== APP ====================
 
 app = FastAPI()
@@ -247,6 +1195,132 @@ def _serialize_category(doc: Dict[str, Any]) -> Dict[str, Any]:
 
 # ==================== AUTH HELPERS ====================
 
+ADMIN_TOKEN_TTL_HOURS = float(os.environ.get("ADMIN_TOKEN_TTL_HOURS", "24"))
+ADMIN_REVOCATION_REFRESH = float(os.environ.get("ADMIN_REVOCATION_REFRESH", "15"))
+
+
+def _b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+
+def _b64url_decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode((text + "=" * (-len(text) % 4)).encode("ascii"))
+
+
+class _AdminTokens:
+    # Admin tokens are "<payload>.<hmac>" and verified in memory. Logout adds the
+    # session id to a revocation list; a password change moves notBefore so every
+    # token issued earlier is rejected. Both are cached and re-read periodically
+    # so other workers converge within refresh_interval.
+    def __init__(self, ttl_hours: float, refresh_interval: float):
+        self.ttl_ms = int(ttl_hours * 3600 * 1000)
+        self.refresh_interval = refresh_interval
+        self.not_before = 0
+        self.revoked: Dict[str, int] = {}
+        self._secret: Optional[bytes] = (os.environ.get("ADMIN_TOKEN_SECRET") or "").encode("utf-8") or None
+        self._loaded = False
+
+    async def load(self) -> None:
+        if self._secret is None:
+            # shared through the database so every worker signs with the same key
+            doc = await db.admin.find_one_and_update(
+                {"key": "tokenSecret"},
+                {"$setOnInsert": {"key": "tokenSecret", "value": secrets.token_urlsafe(48)}},
+                projection={"_id": 0},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+            self._secret = doc["value"].encode("utf-8")
+        await self.refresh()
+        self._loaded = True
+
+    async def ensure_loaded(self) -> None:
+        if not self._loaded:
+            await self.load()
+
+    async def refresh(self) -> None:
+        now_ms = int(time.time() * 1000)
+        policy = await db.admin.find_one({"key": "tokenPolicy"}, {"_id": 0}) or {}
+        rows = await db.admin_revocations.find({"exp": {"$gt": now_ms}}, {"_id": 0, "sid": 1, "exp": 1}).to_list(None)
+
+        self.not_before = int((policy.get("value") or {}).get("notBefore") or 0)
+        self.revoked = {r["sid"]: int(r["exp"]) for r in rows}
+
+    def _sign(self, payload: str) -> str:
+        return _b64url(hmac.new(self._secret, payload.encode("ascii"), hashlib.sha256).digest())
+
+    def issue(self) -> Dict[str, Any]:
+        iat = int(time.time() * 1000)
+        claims = {"sid": str(uuid.uuid4()), "iat": iat, "exp": iat + self.ttl_ms}
+        payload = _b64url(json.dumps(claims, separators=(",", ":")).encode("utf-8"))
+        return {
+            "token": f"{payload}.{self._sign(payload)}",
+            "expiresAt": datetime.fromtimestamp(claims["exp"] / 1000, tz=timezone.utc).isoformat(),
+            "sessionId": claims["sid"],
+        }
+
+    def verify(self, token: str) -> Dict[str, Any]:
+        # issued tokens are plain ASCII; anything else would make _sign and
+        # compare_digest raise, turning a forged header into a 500
+        if not token.isascii():
+            raise HTTPException(status_code=401, detail="Invalid admin session")
+
+        payload, _, signature = token.partition(".")
+        if not payload or not signature or not hmac.compare_digest(signature, self._sign(payload)):
+            raise HTTPException(status_code=401, detail="Invalid admin session")
+
+        try:
+            claims = json.loads(_b64url_decode(payload))
+            sid, iat, exp = str(claims["sid"]), int(claims["iat"]), int(claims["exp"])
+        except Exception:
+            raise HTTPException(status_code=401, detail="Invalid admin session")
+
+        if exp <= int(time.time() * 1000):
+            raise HTTPException(status_code=401, detail="Admin session expired")
+        if iat < self.not_before or sid in self.revoked:
+            raise HTTPException(status_code=401, detail="Admin session revoked")
+
+        return {
+            "token": token,
+            "sessionId": sid,
+            "issuedAt": datetime.fromtimestamp(iat / 1000, tz=timezone.utc).isoformat(),
+            "expiresAt": datetime.fromtimestamp(exp / 1000, tz=timezone.utc).isoformat(),
+            "exp": exp,
+        }
+
+    async def revoke(self, session: Dict[str, Any]) -> None:
+        sid, exp = session["sessionId"], int(session["exp"])
+        self.revoked[sid] = exp
+        await db.admin_revocations.update_one(
+            {"sid": sid},
+            {"$set": {
+                "sid": sid,
+                "exp": exp,
+                "expiresAt": datetime.fromtimestamp(exp / 1000, tz=timezone.utc),
+            }},
+            upsert=True,
+        )
+
+    async def revoke_all(self) -> None:
+        self.not_before = int(time.time() * 1000)
+        await db.admin.update_one(
+            {"key": "tokenPolicy"},
+            {"$set": {"key": "tokenPolicy", "value": {"notBefore": self.not_before}}},
+            upsert=True,
+        )
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning("Admin revocation refresh failed: %s", e)
+
+
+admin_tokens = _AdminTokens(ADMIN_TOKEN_TTL_HOURS, ADMIN_REVOCATION_REFRESH)
+
+
 def _get_bearer_token(authorization: Optional[str]) -> Optional[str]:
     if not authorization:
         return None
@@ -259,50 +1333,33 @@ def _get_bearer_token(authorization: Optional[str]) -> Optional[str]:
     return token
 
 
+def _request_token(request: Request, authorization: Optional[str]) -> Optional[str]:
+    token = _get_bearer_token(authorization)
+    if not token:
+        token = (request.query_params.get("token") or "").strip() or None
+    return token
+
+
 async def require_admin(
     request: Request,
     authorization: Optional[str] = Header(default=None),
 ) -> Dict[str, Any]:
-    token = _get_bearer_token(authorization)
-
-    if not token:
-        token = request.query_params.get("token")
-        if token:
-            token = token.strip()
+    token = _request_token(request, authorization)
 
     if not token:
         raise HTTPException(status_code=401, detail="Missing admin token")
 
-    doc = await db.admin.find_one({"key": "session"}, {"_id": 0})
-    if not doc or "value" not in doc:
-        raise HTTPException(status_code=401, detail="No active admin session")
-
-    sess = doc["value"]
-    if sess.get("token") != token:
-        raise HTTPException(status_code=401, detail="Invalid admin session")
-
-    expires_raw = sess.get("expiresAt")
-    if not expires_raw:
-        raise HTTPException(status_code=401, detail="Invalid admin session expiry")
-
-    try:
-        expires_at = datetime.fromisoformat(str(expires_raw).replace("Z", "+00:00"))
-    except Exception:
-        raise HTTPException(status_code=401, detail="Invalid admin session expiry format")
-
-    if expires_at.tzinfo is None:
-        expires_at = expires_at.replace(tzinfo=timezone.utc)
-
-    if datetime.now(timezone.utc) > expires_at:
-        raise HTTPException(status_code=401, detail="Admin session expired")
-
-    return sess
+    await admin_tokens.ensure_loaded()
+    return admin_tokens.verify(token)
 
 
 async def optional_admin(
     request: Request,
     authorization: Optional[str] = Header(default=None),
 ) -> Optional[Dict[str, Any]]:
+    # anonymous storefront traffic never touches the admin collection
+    if not _request_token(request, authorization):
+        return None
     try:
         return await require_admin(request=request, authorization=authorization)
     except HTTPException:
@@ -486,6 +1543,33 @@ class StorefrontPage(BaseModel):
     updatedAt: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
 
 
+class ProductBatchItem(BaseModel):
+    productId: str
+    variantId: Optional[str] = None
+
+
+ANALYTICS_MAX_BATCH = 500
+ANALYTICS_MAX_PROPERTIES_BYTES = 2048
+
+
+class AnalyticsEvent(BaseModel):
+    event: str = Field(..., pattern=r"^[a-z][a-z0-9_]{0,39}$")
+    timestamp: Optional[str] = Field(None, max_length=40)
+    sessionId: Optional[str] = Field(None, max_length=64)
+    properties: Dict[str, Any] = {}
+
+
+class AnalyticsBatch(BaseModel):
+    events: List[AnalyticsEvent] = Field(..., max_length=ANALYTICS_MAX_BATCH)
+
+
+class ProductBatchRequest(BaseModel):
+    ids: List[str] = []
+    items: List[ProductBatchItem] = []
+    fields: Optional[str] = None
+    currency: Optional[str] = None
+
+
 class Settings(BaseModel):
     currencyRates: Dict[str, float] = {"KES": 1.0, "USD": 0.0077, "EUR": 0.0071}
     currencyRatesUpdated: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
@@ -534,25 +1618,93 @@ async def get_products(
     search: Optional[str] = None,
     sort: Optional[str] = None,
     status: str = "active",
+    cursor: Optional[str] = None,
+    includeTotal: bool = Query(True),
+    minPrice: Optional[float] = Query(None, ge=0),
+    maxPrice: Optional[float] = Query(None, ge=0),
+    isNewArrival: Optional[bool] = None,
+    isFeatured: Optional[bool] = None,
+    isBestseller: Optional[bool] = None,
+    facets: Optional[str] = None,
+    fields: Optional[str] = None,
+    currency: Optional[str] = None,
 ):
-    query: Dict[str, Any] = {"status": status}
+    facet_names = _parse_facets(facets)
+    search_terms = _text_search_terms(search) if search else ""
+    conversion = await _currency_conversion(currency)
+
+    if search and search.strip() and not search_terms:
+        # nothing searchable (punctuation, emoji); dropping the filter would
+        # return the whole catalog
+        empty: Dict[str, Any] = {
+            "products": [],
+            "total": 0 if includeTotal else None,
+            "page": page,
+            "pages": 0 if includeTotal else None,
+            "hasMore": False,
+            "nextCursor": None,
+        }
+        if facet_names:
+            empty["facets"] = {name: _format_facet(name, []) for name in facet_names}
+        return empty
+
+    cache_key = catalog_cache.key(
+        "products",
+        page=page,
+        limit=limit,
+        category=category,
+        collection=collection,
+        search=search_terms,
+        sort=sort,
+        status=status,
+        cursor=cursor,
+        includeTotal=includeTotal,
+        minPrice=minPrice,
+        maxPrice=maxPrice,
+        isNewArrival=isNewArrival,
+        isFeatured=isFeatured,
+        isBestseller=isBestseller,
+        facets=tuple(facet_names),
+        fields=fields,
+        currency=conversion,
+    )
+    cached = catalog_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    base: Dict[str, Any] = {"status": status}
+
+    if search_terms:
+        base["$text"] = {"$search": search_terms}
+
+    # keyed by facet name so each facet can be counted without its own filter
+    filters: Dict[str, Dict[str, Any]] = {}
 
     if category:
-        query["category"] = category
+        filters["category"] = {"category": category}
 
     if collection:
-        query["collections"] = collection
-
-    if search:
-        query["$or"] = [
-            {"name": {"$regex": search, "$options": "i"}},
-            {"shortDescription": {"$regex": search, "$options": "i"}},
-            {"longDescription": {"$regex": search, "$options": "i"}},
-            {"tags": {"$elemMatch": {"$regex": search, "$options": "i"}}},
-        ]
-
-    skip = (page - 1) * limit
-    total = await db.products.count_documents(query)
+        filters["collections"] = {"collections": collection}
+
+    if minPrice is not None or maxPrice is not None:
+        price_range: Dict[str, Any] = {}
+        if minPrice is not None:
+            price_range["$gte"] = minPrice
+        if maxPrice is not None:
+            price_range["$lt"] = maxPrice
+        filters["price"] = {"basePrice": price_range}
+
+    for flag, value in (
+        ("isNewArrival", isNewArrival),
+        ("isFeatured", isFeatured),
+        ("isBestseller", isBestseller),
+    ):
+        if value is not None:
+            filters[flag] = {flag: value}
+
+    query: Dict[str, Any] = dict(base)
+    for clause in filters.values():
+        query.update(clause)
 
     sort_field = "createdAt"
     sort_order = -1
@@ -567,31 +1719,485 @@ async def get_products(
         sort_field = "name"
         sort_order = 1
 
-    products = (
-        await db.products.find(query, {"_id": 0})
-        .sort(sort_field, sort_order)
-        .skip(skip)
-        .limit(limit)
-        .to_list(limit)
-    )
+    by_relevance = bool(search_terms) and sort in (None, "", "relevance")
+    sort_key = "relevance" if by_relevance else f"{sort_field}:{sort_order}"
 
-    return {
-        "products": products,
+    projection = _product_projection(fields, sort_field)
+    if by_relevance:
+        projection["score"] = {"$meta": "textScore"}
+        sort_spec: List[Any] = [("score", {"$meta": "textScore"}), ("createdAt", -1), ("id", -1)]
+    else:
+        sort_spec = [(sort_field, sort_order), ("id", sort_order)]
+
+    find_query = query
+    skip = (page - 1) * limit
+    if cursor:
+        if by_relevance:
+            raise HTTPException(status_code=400, detail="Cursor pagination is not available for relevance sort")
+        find_query = _with_keyset(query, sort_field, sort_order, _decode_cursor(cursor, sort_key))
+        skip = 0
+
+    facet_counts: Optional[Dict[str, Any]] = None
+
+    if facet_names:
+        # one $facet round trip: the page, the total and every requested facet
+        branches: Dict[str, Any] = {
+            "products": [
+                {"$match": {k: v for k, v in find_query.items() if k not in base}},
+                {"$sort": dict(sort_spec)},
+                {"$skip": skip},
+                {"$limit": limit + 1},
+                {"$project": {k: v for k, v in projection.items() if k != "score"}},
+            ],
+        }
+        if includeTotal:
+            branches["total"] = [
+                {"$match": {k: v for k, v in query.items() if k not in base}},
+                {"$count": "count"},
+            ]
+        for name in facet_names:
+            others: Dict[str, Any] = {}
+            for key, clause in filters.items():
+                if key != name:
+                    others.update(clause)
+            branches[f"facet_{name}"] = _facet_branch(name, others)
+
+        result = await db.products.aggregate([
+            {"$match": base},
+            {"$facet": branches},
+        ]).to_list(1)
+        result = result[0] if result else {}
+
+        products = result.get("products") or []
+        total = None
+        if includeTotal:
+            total_rows = result.get("total") or []
+            total = total_rows[0]["count"] if total_rows else 0
+        facet_counts = {name: _format_facet(name, result.get(f"facet_{name}") or []) for name in facet_names}
+    else:
+        total = await db.products.count_documents(query) if includeTotal else None
+
+        products = (
+            await db.products.find(find_query, projection)
+            .sort(sort_spec)
+            .skip(skip)
+            .limit(limit + 1)
+            .to_list(limit + 1)
+        )
+
+    has_more = len(products) > limit
+    products = products[:limit]
+
+    if by_relevance:
+        for p in products:
+            p.pop("score", None)
+
+    next_cursor = None
+    if has_more and not by_relevance:
+        last = products[-1]
+        next_cursor = _encode_cursor(sort_key, last.get(sort_field), last.get("id"))
+
+    response: Dict[str, Any] = {
+        "products": _convert_products(products, conversion),
         "total": total,
         "page": page,
-        "pages": (total + limit - 1) // limit,
+        "pages": (total + limit - 1) // limit if total is not None else None,
+        "hasMore": has_more,
+        "nextCursor": next_cursor,
+    }
+    if facet_counts is not None:
+        response["facets"] = facet_counts
+
+    catalog_cache.set(cache_key, response)
+    return response
+
+
+PRODUCT_BATCH_LIMIT = 100
+
+
+async def _load_product_batch(
+    ids: List[str],
+    variant_ids: Dict[str, List[str]],
+    fields: Optional[str],
+    currency: Optional[str] = None,
+) -> Dict[str, Any]:
+    conversion = await _currency_conversion(currency)
+
+    order: List[str] = []
+    for pid in ids:
+        pid = str(pid or "").strip()
+        if pid and pid not in order:
+            order.append(pid)
+
+    if len(order) > PRODUCT_BATCH_LIMIT:
+        raise HTTPException(status_code=400, detail=f"At most {PRODUCT_BATCH_LIMIT} products per batch")
+    if not order:
+        return {"products": [], "missing": [], "missingVariants": []}
+
+    projection = _product_projection(fields or "cart")
+    if variant_ids and len(projection) > 1:
+        projection["variants"] = 1
+
+    docs = await db.products.find({"id": {"$in": order}}, projection).to_list(len(order))
+    by_id = {d.get("id"): d for d in docs}
+
+    products = []
+    missing = []
+    missing_variants = []
+
+    for pid in order:
+        doc = by_id.get(pid)
+        if not doc:
+            missing.append(pid)
+            continue
+
+        wanted = variant_ids.get(pid)
+        if wanted:
+            variants = [v for v in (doc.get("variants") or []) if str(v.get("id")) in wanted]
+            found = {str(v.get("id")) for v in variants}
+            missing_variants.extend(
+                {"productId": pid, "variantId": vid} for vid in wanted if vid not in found
+            )
+            doc["variants"] = variants
+
+        products.append(doc)
+
+    return {
+        "products": _convert_products(products, conversion),
+        "missing": missing,
+        "missingVariants": missing_variants,
+    }
+
+
+@api_router.get("/products/batch")
+async def get_products_batch(
+    ids: str = Query(""),
+    fields: Optional[str] = None,
+    currency: Optional[str] = None,
+):
+    return await _load_product_batch(ids.split(","), {}, fields, currency)
+
+
+@api_router.post("/products/batch")
+async def post_products_batch(payload: ProductBatchRequest):
+    ids = list(payload.ids)
+    variant_ids: Dict[str, List[str]] = {}
+
+    for item in payload.items:
+        pid = item.productId.strip()
+        ids.append(pid)
+        vid = str(item.variantId or "").strip()
+        if vid and vid not in variant_ids.setdefault(pid, []):
+            variant_ids[pid].append(vid)
+
+    return await _load_product_batch(ids, variant_ids, payload.fields, payload.currency)
+
+
+# ==================== PRODUCT IMPORT / EXPORT ====================
+
+PRODUCT_IMPORT_BATCH_SIZE = 500
+PRODUCT_LIST_FIELDS = ("images", "tags", "collections", "relatedProductIds", "bundleProductIds")
+# maintained by the server; an exported snapshot of them must never overwrite live values
+PRODUCT_COUNTER_FIELDS = ("averageRating", "reviewCount", "viewCount", "addToCartCount", "totalPurchases")
+# stand-ins for required columns a row leaves out; such a row can only update
+PRODUCT_IMPORT_PLACEHOLDERS: Dict[str, Any] = {
+    name: 0 if name == "basePrice" else ""
+    for name, field in Product.model_fields.items()
+    if field.is_required()
+}
+
+
+async def _iter_upload_lines(file: UploadFile, chunk_size: int = 64 * 1024) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            break
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line + "\n"
+
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer
+
+
+async def _iter_ndjson_rows(lines: AsyncIterator[str]) -> AsyncIterator[Tuple[int, Any]]:
+    row_number = 0
+    async for line in lines:
+        row_number += 1
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield row_number, "Invalid JSON"
+            continue
+        yield row_number, row if isinstance(row, dict) else "Each line must be a JSON object"
+
+
+async def _iter_csv_rows(lines: AsyncIterator[str]) -> AsyncIterator[Tuple[int, Any]]:
+    header: Optional[List[str]] = None
+    pending = ""
+    row_number = 0
+
+    async for line in lines:
+        pending += line
+        # an odd number of quotes means a quoted field continues on the next line
+        if pending.count('"') % 2:
+            continue
+
+        record = next(csv.reader([pending]), [])
+        pending = ""
+        if not any(c.strip() for c in record):
+            continue
+
+        if header is None:
+            header = [h.strip() for h in record]
+            continue
+
+        row_number += 1
+        row: Dict[str, Any] = {}
+        try:
+            for key, value in zip(header, record):
+                value = value.strip()
+                if not key or value == "":
+                    continue
+                if key in PRODUCT_LIST_FIELDS:
+                    row[key] = [v.strip() for v in value.split("|") if v.strip()]
+                elif key == "variants":
+                    row[key] = json.loads(value)
+                else:
+                    row[key] = value
+        except ValueError:
+            yield row_number, "variants must be a JSON array"
+            continue
+        yield row_number, row
+
+    if pending.strip():
+        yield row_number + 1, "Unterminated quoted field"
+
+
+def _variants_keeping_stock(variants: List[Dict[str, Any]]) -> Dict[str, Any]:
+    # live stock moves with every reservation; an imported snapshot only seeds
+    # variants the stored product does not have yet
+    stored_stock = {
+        "$let": {
+            "vars": {"old": {"$arrayElemAt": [
+                {"$filter": {
+                    "input": {"$ifNull": ["$variants", []]},
+                    "as": "o",
+                    "cond": {"$eq": ["$$o.id", "$$v.id"]},
+                }},
+                0,
+            ]}},
+            "in": {"$ifNull": ["$$old.stock", "$$v.stock"]},
+        }
+    }
+    return {"$map": {
+        "input": {"$literal": variants},
+        "as": "v",
+        "in": {"$mergeObjects": ["$$v", {"stock": stored_stock}]},
+    }}
+
+
+def _import_pipeline(set_doc: Dict[str, Any], on_insert: Dict[str, Any]) -> List[Dict[str, Any]]:
+    fields = {k: {"$literal": v} for k, v in set_doc.items() if k != "variants"}
+    fields["variants"] = _variants_keeping_stock(set_doc["variants"])
+    if not on_insert:
+        return [{"$set": fields}]
+
+    # pipeline updates have no $setOnInsert; a freshly upserted document only
+    # carries the filter field, so a missing name marks an insert
+    return [
+        {"$set": {"_importNew": {"$eq": [{"$type": "$name"}, "missing"]}}},
+        {"$set": fields},
+        {"$set": {k: {"$cond": ["$_importNew", {"$literal": v}, f"${k}"]} for k, v in on_insert.items()}},
+        {"$unset": "_importNew"},
+    ]
+
+
+def _product_import_op(
+    row: Dict[str, Any],
+    now_iso: str,
+    update_stock: bool = False,
+) -> Tuple[UpdateOne, Optional[Dict[str, Any]]]:
+    missing = [k for k in PRODUCT_IMPORT_PLACEHOLDERS if k not in row]
+    if missing and not (row.get("id") or row.get("slug")):
+        raise HTTPException(status_code=400, detail=f"Missing required columns: {', '.join(missing)}")
+
+    placeholders = {k: PRODUCT_IMPORT_PLACEHOLDERS[k] for k in missing}
+    product_dict = _normalize_product_dict(Product(**{**placeholders, **row}).dict())
+
+    provided = set(row)
+    if "images" in provided:
+        provided |= {"primaryImage", "modelImage"}
+    if "category" in provided:
+        provided.add("categorySlug")
+
+    # only columns present in the row overwrite an existing product; the rest
+    # (counters, defaults, createdAt) are written on insert only
+    set_doc = {
+        k: v for k, v in product_dict.items()
+        if k in provided and k not in ("id", "createdAt", *PRODUCT_COUNTER_FIELDS)
     }
+    set_doc["updatedAt"] = now_iso
+    filt = {"id": product_dict["id"]} if "id" in row else {"slug": product_dict["slug"]}
+
+    on_insert: Dict[str, Any] = {}
+    if not missing:
+        on_insert = {k: v for k, v in product_dict.items() if k not in set_doc}
+        if "createdAt" not in row:
+            on_insert["createdAt"] = now_iso
+        on_insert.update(ratingStats=_empty_rating_stats(), reviewCount=0, averageRating=0.0)
+
+    if "variants" in set_doc and not update_stock:
+        update: Any = _import_pipeline(set_doc, on_insert)
+    elif on_insert:
+        update = {"$set": set_doc, "$setOnInsert": on_insert}
+    else:
+        update = {"$set": set_doc}
+
+    # a row without every required column has too little to create a product,
+    # so it only updates one that already exists
+    return UpdateOne(filt, update, upsert=not missing), filt if missing else None
+
+
+async def _flush_product_import(
+    ops: List[UpdateOne],
+    row_numbers: List[int],
+    update_only: List[Optional[Dict[str, Any]]],
+    summary: Dict[str, Any],
+) -> None:
+    filters = [f for f in update_only if f]
+    if filters:
+        found = await db.products.find({"$or": filters}, {"_id": 0, "id": 1, "slug": 1}).to_list(None)
+        known = {("id", d.get("id")) for d in found} | {("slug", d.get("slug")) for d in found}
+        keep = []
+        for i, f in enumerate(update_only):
+            if f and not any((k, v) in known for k, v in f.items()):
+                summary["errors"].append({
+                    "row": row_numbers[i],
+                    "error": "No existing product to update; new products need every required column",
+                })
+            else:
+                keep.append(i)
+        ops = [ops[i] for i in keep]
+        row_numbers = [row_numbers[i] for i in keep]
+
+    if not ops:
+        return
+
+    try:
+        result = await db.products.bulk_write(ops, ordered=False)
+        details = result.bulk_api_result
+    except BulkWriteError as e:
+        details = e.details
+        for err in details.get("writeErrors") or []:
+            summary["errors"].append({
+                "row": row_numbers[err["index"]],
+                "error": err.get("errmsg") or "Write failed",
+            })
+
+    summary["created"] += int(details.get("nUpserted") or 0)
+    summary["updated"] += int(details.get("nMatched") or 0)
+
+
+def _validation_message(e: ValidationError) -> str:
+    parts = []
+    for err in e.errors():
+        loc = ".".join(str(x) for x in err.get("loc") or [])
+        parts.append(f"{loc}: {err.get('msg')}" if loc else str(err.get("msg")))
+    return "; ".join(parts)
+
+
+@api_router.post("/products/import")
+async def import_products(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$"),
+    syncCategories: bool = Query(False),
+    updateStock: bool = Query(False),
+    session: Dict[str, Any] = Depends(require_admin),
+):
+    fmt = format
+    if not fmt:
+        name = (file.filename or "").lower()
+        fmt = "csv" if name.endswith(".csv") else "ndjson"
+
+    rows = _iter_upload_lines(file)
+    parsed = _iter_csv_rows(rows) if fmt == "csv" else _iter_ndjson_rows(rows)
+
+    summary: Dict[str, Any] = {"processed": 0, "created": 0, "updated": 0, "errors": []}
+    now_iso = datetime.now(timezone.utc).isoformat()
+    ops: List[UpdateOne] = []
+    row_numbers: List[int] = []
+    update_only: List[Optional[Dict[str, Any]]] = []
+
+    async for row_number, row in parsed:
+        summary["processed"] += 1
+
+        if isinstance(row, str):
+            summary["errors"].append({"row": row_number, "error": row})
+            continue
+
+        try:
+            op, existing_filter = _product_import_op(row, now_iso, updateStock)
+            ops.append(op)
+            row_numbers.append(row_number)
+            update_only.append(existing_filter)
+        except ValidationError as e:
+            summary["errors"].append({"row": row_number, "error": _validation_message(e)})
+        except HTTPException as e:
+            summary["errors"].append({"row": row_number, "error": e.detail})
+
+        if len(ops) >= PRODUCT_IMPORT_BATCH_SIZE:
+            await _flush_product_import(ops, row_numbers, update_only, summary)
+            ops, row_numbers, update_only = [], [], []
+
+    await _flush_product_import(ops, row_numbers, update_only, summary)
+
+    if summary["created"] or summary["updated"]:
+        catalog_cache.bump()
+
+        if syncCategories:
+            sync = await _sync_categories_from_products()
+            summary["categories"] = {k: sync[k] for k in ("created", "updated", "unchanged")}
+
+    return summary
+
+
+@api_router.get("/products/export")
+async def export_products(
+    format: str = Query("ndjson", pattern="^(csv|ndjson)$"),
+    status: Optional[str] = None,
+    category: Optional[str] = None,
+    session: Dict[str, Any] = Depends(require_admin),
+):
+    query: Dict[str, Any] = {}
+    if status:
+        query["status"] = status
+    if category:
+        query["category"] = category
+
+    cursor = db.products.find(query, {"_id": 0}).sort("createdAt", 1).batch_size(EXPORT_BATCH_SIZE)
+    return _export_response(_stream_export(cursor, format, list(Product.model_fields)), format, "products")
 
 
 @api_router.get("/products/{product_id}")
-async def get_product(product_id: str):
+async def get_product(product_id: str, currency: Optional[str] = None):
+    conversion = await _currency_conversion(currency)
+
     product = await db.products.find_one({"id": product_id}, {"_id": 0})
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
 
-    await db.products.update_one({"id": product_id}, {"$inc": {"viewCount": 1}})
-    product["viewCount"] = product.get("viewCount", 0) + 1
-    return product
+    view_counter.add(product_id)
+    product["viewCount"] = product.get("viewCount", 0) + view_counter.pending(product_id)
+    return _convert_products([product], conversion)[0]
 
 
 @api_router.post("/products")
@@ -602,43 +2208,14 @@ async def create_product(
     product_dict = product.dict()
     now_iso = datetime.now(timezone.utc).isoformat()
 
-    product_dict["images"] = product_dict.get("images") or []
-    product_dict["tags"] = product_dict.get("tags") or []
-    product_dict["collections"] = product_dict.get("collections") or []
-    product_dict["relatedProductIds"] = product_dict.get("relatedProductIds") or []
-    product_dict["bundleProductIds"] = product_dict.get("bundleProductIds") or []
-
-    image_roles = _normalize_image_roles(
-        images=product_dict["images"],
-        primary_image=product_dict.get("primaryImage"),
-        model_image=product_dict.get("modelImage"),
-    )
-    product_dict["primaryImage"] = image_roles["primaryImage"]
-    product_dict["modelImage"] = image_roles["modelImage"]
-
-    clean_variants = []
-    for v in (product_dict.get("variants") or []):
-        sku = str(v.get("sku") or "").strip()
-        if not sku:
-            raise HTTPException(status_code=400, detail="Each variant must have an SKU")
-
-        variant_id = str(v.get("id") or "").strip() or str(uuid.uuid4())
-
-        clean_variants.append({
-            "id": variant_id,
-            "size": (v.get("size") or None),
-            "color": (v.get("color") or None),
-            "material": (v.get("material") or None),
-            "stock": int(v.get("stock") or 0),
-            "sku": sku,
-            "priceAdjustment": float(v.get("priceAdjustment") or 0.0),
-        })
-
-    product_dict["variants"] = clean_variants
+    _normalize_product_dict(product_dict)
     product_dict["createdAt"] = product_dict.get("createdAt") or now_iso
     product_dict["updatedAt"] = now_iso
+    # new products start with stats so the startup backfill never sees them as missing
+    product_dict.update(ratingStats=_empty_rating_stats(), reviewCount=0, averageRating=0.0)
 
     result = await db.products.insert_one(product_dict)
+    catalog_cache.bump()
 
     created_product = await db.products.find_one(
         {"_id": result.inserted_id},
@@ -664,52 +2241,220 @@ async def update_product(
     product_dict = product.dict()
     product_dict["id"] = product_id
 
-    product_dict["images"] = product_dict.get("images") or []
-    product_dict["tags"] = product_dict.get("tags") or []
-    product_dict["collections"] = product_dict.get("collections") or []
-    product_dict["relatedProductIds"] = product_dict.get("relatedProductIds") or []
-    product_dict["bundleProductIds"] = product_dict.get("bundleProductIds") or []
+    _normalize_product_dict(product_dict)
+    product_dict["createdAt"] = existing.get("createdAt") or product_dict.get("createdAt")
+    product_dict["updatedAt"] = datetime.now(timezone.utc).isoformat()
+
+    await db.products.update_one({"id": product_id}, {"$set": product_dict})
+    catalog_cache.bump()
+    return product_dict
+
+
+@api_router.delete("/products/{product_id}")
+async def delete_product(product_id: str, session: Dict[str, Any] = Depends(require_admin)):
+    result = await db.products.delete_one({"id": product_id})
+    if result.deleted_count == 0:
+        raise HTTPException(status_code=404, detail="Product not found")
+    catalog_cache.bump()
+    return {"message": "Product deleted"}
+
+
+# ==================== INVENTORY RESERVATIONS ====================
+
+RESERVATION_TTL_MINUTES = int(os.environ.get("RESERVATION_TTL_MINUTES", "30"))
+RESERVATION_SWEEP_INTERVAL = float(os.environ.get("RESERVATION_SWEEP_INTERVAL", "60"))
+PAID_PAYMENT_STATUSES = ("confirmed", "paid", "completed")
+RELEASING_ORDER_STATUSES = ("cancelled", "refunded")
+
+
+def _reservation_lines(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    totals: Dict[Tuple[str, str], int] = {}
+    for item in items or []:
+        pid = str(item.get("productId") or "").strip()
+        vid = str(item.get("variantId") or "").strip()
+        qty = int(item.get("quantity") or 0)
+        if not pid or not vid or qty <= 0:
+            continue
+        totals[(pid, vid)] = totals.get((pid, vid), 0) + qty
+
+    return [{"productId": pid, "variantId": vid, "quantity": qty} for (pid, vid), qty in totals.items()]
+
+
+async def _reserve_line(line: Dict[str, Any]) -> Optional[int]:
+    qty = line["quantity"]
+    # the stock guard and the decrement are one atomic single-document update;
+    # returns the stock left on the variant, or None when it was short
+    doc = await db.products.find_one_and_update(
+        {
+            "id": line["productId"],
+            "variants": {"$elemMatch": {"id": line["variantId"], "stock": {"$gte": qty}}},
+        },
+        {"$inc": {"variants.$[v].stock": -qty}},
+        array_filters=[{"v.id": line["variantId"], "v.stock": {"$gte": qty}}],
+        projection={"_id": 0, "variants": {"$elemMatch": {"id": line["variantId"]}}},
+        return_document=ReturnDocument.AFTER,
+    )
+    if not doc:
+        return None
+    return int(((doc.get("variants") or [{}])[0]).get("stock") or 0)
+
+
+async def _release_lines(lines: List[Dict[str, Any]]) -> None:
+    if not lines:
+        return
+    await db.products.bulk_write(
+        [
+            UpdateOne(
+                {"id": line["productId"]},
+                {"$inc": {"variants.$[v].stock": line["quantity"]}},
+                array_filters=[{"v.id": line["variantId"]}],
+            )
+            for line in lines
+        ],
+        ordered=False,
+    )
+
+    # stock is enforced by the reservation, not the cached storefront; only a
+    # variant coming back in stock changes what the catalog shows
+    products = await db.products.find(
+        {"id": {"$in": sorted({line["productId"] for line in lines})}},
+        {"_id": 0, "id": 1, "variants.id": 1, "variants.stock": 1},
+    ).to_list(None)
+    stock = {(p["id"], v.get("id")): int(v.get("stock") or 0) for p in products for v in p.get("variants") or []}
+    if any(stock.get((line["productId"], line["variantId"]), 0) <= line["quantity"] for line in lines):
+        catalog_cache.bump()
+
+
+async def _unreservable_lines(short: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # the client's isPreorder flag is not trusted: a short line may go through
+    # unreserved only if the store and the product both allow preorders
+    if not short:
+        return []
+    if not (await settings_cache.get()).get("allowPreorders", True):
+        return short
+
+    products = await db.products.find(
+        {"id": {"$in": sorted({line["productId"] for line in short})}},
+        {"_id": 0, "id": 1, "allowPreorder": 1, "variants.id": 1},
+    ).to_list(None)
+    preorder_variants = {
+        (p["id"], v.get("id"))
+        for p in products if p.get("allowPreorder")
+        for v in p.get("variants") or []
+    }
+    return [line for line in short if (line["productId"], line["variantId"]) not in preorder_variants]
+
+
+async def _reserve_inventory(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    lines = _reservation_lines(items)
+    if not lines:
+        return []
+
+    results = await asyncio.gather(*(_reserve_line(line) for line in lines))
+    reserved = [line for line, left in zip(lines, results) if left is not None]
+    failed = await _unreservable_lines([line for line, left in zip(lines, results) if left is None])
+
+    if failed:
+        await _release_lines(reserved)
+        missing = ", ".join(f"{line['productId']}/{line['variantId']}" for line in failed)
+        raise HTTPException(status_code=409, detail=f"Insufficient stock for: {missing}")
+
+    if 0 in results:
+        # a variant just sold out
+        catalog_cache.bump()
+    # preorder lines hold no stock, so only the reserved ones are ever released
+    return reserved
+
+
+async def _release_order_reservation(order_filter: Dict[str, Any], from_statuses: List[str], to_status: str) -> bool:
+    now_iso = datetime.now(timezone.utc).isoformat()
+    # flipping the status first means only one caller ever returns the stock
+    order = await db.orders.find_one_and_update(
+        {**order_filter, "reservation.status": {"$in": from_statuses}},
+        {"$set": {"reservation.status": to_status, "updatedAt": now_iso}},
+        projection={"reservation.items": 1},
+    )
+    if not order:
+        return False
+
+    await _release_lines((order.get("reservation") or {}).get("items") or [])
+    return True
+
+
+async def _sync_order_reservation(order_filter: Dict[str, Any], status: Optional[str], payment_status: Optional[str]) -> None:
+    status = str(status or "").lower()
+    payment_status = str(payment_status or "").lower()
+
+    if status in RELEASING_ORDER_STATUSES:
+        await _release_order_reservation(order_filter, ["held", "committed"], "released")
+        return
+
+    if payment_status not in PAID_PAYMENT_STATUSES:
+        return
+
+    committed = await db.orders.update_one(
+        {**order_filter, "reservation.status": "held"},
+        {"$set": {"reservation.status": "committed", "reservation.expiresAt": None}},
+    )
+    if committed.modified_count:
+        return
+
+    await _reclaim_expired_reservation(order_filter)
+
+
+async def _reclaim_expired_reservation(order_filter: Dict[str, Any]) -> bool:
+    # paid after the hold expired: take the stock again, or 409 if it is gone.
+    # Claiming the order first means concurrent confirmations reserve only once.
+    order = await db.orders.find_one_and_update(
+        {**order_filter, "reservation.status": "expired"},
+        {"$set": {"reservation.status": "reserving"}},
+        projection={"items": 1},
+    )
+    if not order:
+        return False
+
+    try:
+        lines = await _reserve_inventory(order.get("items") or [])
+    except HTTPException:
+        await db.orders.update_one(
+            {"_id": order["_id"], "reservation.status": "reserving"},
+            {"$set": {"reservation.status": "expired"}},
+        )
+        raise
 
-    image_roles = _normalize_image_roles(
-        images=product_dict["images"],
-        primary_image=product_dict.get("primaryImage"),
-        model_image=product_dict.get("modelImage"),
+    await db.orders.update_one(
+        {"_id": order["_id"]},
+        {"$set": {"reservation": {"status": "committed", "items": lines, "expiresAt": None}}},
     )
-    product_dict["primaryImage"] = image_roles["primaryImage"]
-    product_dict["modelImage"] = image_roles["modelImage"]
-
-    clean_variants = []
-    for v in (product_dict.get("variants") or []):
-        sku = str(v.get("sku") or "").strip()
-        if not sku:
-            raise HTTPException(status_code=400, detail="Each variant must have an SKU")
+    return True
 
-        variant_id = str(v.get("id") or "").strip() or str(uuid.uuid4())
 
-        clean_variants.append({
-            "id": variant_id,
-            "size": (v.get("size") or None),
-            "color": (v.get("color") or None),
-            "material": (v.get("material") or None),
-            "stock": int(v.get("stock") or 0),
-            "sku": sku,
-            "priceAdjustment": float(v.get("priceAdjustment") or 0.0),
-        })
+async def _release_expired_reservations() -> int:
+    now_iso = datetime.now(timezone.utc).isoformat()
+    released = 0
 
-    product_dict["variants"] = clean_variants
-    product_dict["createdAt"] = existing.get("createdAt") or product_dict.get("createdAt")
-    product_dict["updatedAt"] = datetime.now(timezone.utc).isoformat()
+    while await _release_order_reservation(
+        {
+            "reservation.expiresAt": {"$lte": now_iso},
+            "payment.status": {"$nin": list(PAID_PAYMENT_STATUSES)},
+        },
+        ["held"],
+        "expired",
+    ):
+        released += 1
 
-    await db.products.update_one({"id": product_id}, {"$set": product_dict})
-    return product_dict
+    return released
 
 
-@api_router.delete("/products/{product_id}")
-async def delete_product(product_id: str, session: Dict[str, Any] = Depends(require_admin)):
-    result = await db.products.delete_one({"id": product_id})
-    if result.deleted_count == 0:
-        raise HTTPException(status_code=404, detail="Product not found")
-    return {"message": "Product deleted"}
+async def _reservation_sweeper() -> None:
+    while True:
+        await asyncio.sleep(RESERVATION_SWEEP_INTERVAL)
+        try:
+            released = await _release_expired_reservations()
+            if released:
+                logger.info("Released %d expired inventory reservations", released)
+        except Exception as e:
+            logger.warning("Reservation sweep failed: %s", e)
 
 
 # ============================ ORDERS ============================
@@ -724,11 +2469,33 @@ async def create_order(order: Order):
     now_iso = datetime.now(timezone.utc).isoformat()
     order_dict["createdAt"] = order_dict.get("createdAt") or now_iso
     order_dict["updatedAt"] = now_iso
+    order_dict["orderNumberKey"] = _order_number_key(order_dict.get("orderNumber"))
 
     if not isinstance(order_dict.get("statusHistory"), list):
         order_dict["statusHistory"] = []
 
-    result = await db.orders.insert_one(order_dict)
+    lines = await _reserve_inventory(order_dict["items"])
+    paid = str((order_dict.get("payment") or {}).get("status") or "").lower() in PAID_PAYMENT_STATUSES
+    order_dict["reservation"] = {
+        "status": "committed" if paid else "held",
+        "items": lines,
+        "expiresAt": None if paid else (
+            datetime.now(timezone.utc) + timedelta(minutes=RESERVATION_TTL_MINUTES)
+        ).isoformat(),
+    }
+
+    try:
+        result = await db.orders.insert_one(order_dict)
+    except DuplicateKeyError as e:
+        await _release_lines(lines)
+        key_pattern = (e.details or {}).get("keyPattern") or {}
+        if "orderNumber" in key_pattern or "orderNumberKey" in key_pattern:
+            raise HTTPException(status_code=409, detail="An order with this order number already exists")
+        raise HTTPException(status_code=409, detail="Order already exists")
+    except Exception:
+        await _release_lines(lines)
+        raise
+
     order_dict["_id"] = str(result.inserted_id)
     return order_dict
 
@@ -737,18 +2504,11 @@ async def create_order(order: Order):
 
 @api_router.get("/orders/track/{order_number}")
 async def track_order_public(order_number: str):
-    order_number = (order_number or "").strip()
-    if not order_number:
+    key = _order_number_key(order_number)
+    if not key:
         raise HTTPException(status_code=400, detail="Missing order number")
 
-    order = await db.orders.find_one({"orderNumber": order_number}, {"_id": 0})
-
-    if not order:
-        order = await db.orders.find_one(
-            {"orderNumber": {"$regex": f"^{re.escape(order_number)}$", "$options": "i"}},
-            {"_id": 0},
-        )
-
+    order = await db.orders.find_one({"orderNumberKey": key}, PUBLIC_ORDER_PROJECTION)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
 
@@ -757,11 +2517,77 @@ async def track_order_public(order_number: str):
 
 # ==================== ADMIN ORDER MANAGEMENT ====================
 
+ORDER_EXPORT_COLUMNS = [
+    "id",
+    "orderNumber",
+    "createdAt",
+    "status",
+    "payment.method",
+    "payment.status",
+    "payment.mpesaTransactionId",
+    "customer.name",
+    "customer.email",
+    "customer.phone",
+    "delivery.method",
+    "delivery.address",
+    "delivery.city",
+    "delivery.county",
+    "delivery.trackingNumber",
+    "courier",
+    "subtotal",
+    "giftWrapTotal",
+    "discount",
+    "shippingCost",
+    "total",
+    "archived",
+]
+
+
+@api_router.get("/orders/export")
+async def export_orders(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    status: Optional[str] = None,
+    includeArchived: bool = Query(False),
+    columns: Optional[str] = None,
+    session: Dict[str, Any] = Depends(require_admin),
+):
+    query: Dict[str, Any] = {}
+    if not includeArchived:
+        query["$or"] = [{"archived": {"$exists": False}}, {"archived": False}]
+    if status:
+        query["status"] = status
+
+    created: Dict[str, Any] = {}
+    if start_date:
+        created["$gte"] = start_date
+    if end_date:
+        created["$lte"] = end_date
+    if created:
+        query["createdAt"] = created
+
+    selected = [c.strip() for c in str(columns or "").split(",") if c.strip()]
+    if selected and any(c.startswith("_") or "$" in c for c in selected):
+        raise HTTPException(status_code=400, detail="Invalid column name")
+
+    projection: Dict[str, Any] = {"_id": 0}
+    for c in selected:
+        # "customer" already covers "customer.name"; both together is a path collision
+        if not any(c.startswith(other + ".") for other in selected):
+            projection[c] = 1
+
+    cursor = db.orders.find(query, projection).sort("createdAt", 1).batch_size(EXPORT_BATCH_SIZE)
+    return _export_response(_stream_export(cursor, format, selected or ORDER_EXPORT_COLUMNS), format, "orders")
+
+
 @api_router.get("/orders")
 async def get_orders(
     page: int = Query(1, ge=1),
-    limit: int = Query(20, ge=1),
+    limit: int = Query(20, ge=1, le=500),
     includeArchived: bool = Query(False),
+    cursor: Optional[str] = None,
+    includeTotal: bool = Query(True),
     session: Dict[str, Any] = Depends(require_admin),
 ):
     skip = (page - 1) * limit
@@ -770,35 +2596,49 @@ async def get_orders(
     if not includeArchived:
         query["$or"] = [{"archived": {"$exists": False}}, {"archived": False}]
 
-    total = await db.orders.count_documents(query)
+    sort_key = "createdAt:-1"
+    find_query = query
+    if cursor:
+        find_query = _with_keyset(query, "createdAt", -1, _decode_cursor(cursor, sort_key))
+        skip = 0
+
+    total = await db.orders.count_documents(query) if includeTotal else None
     orders = (
-        await db.orders.find(query)
-        .sort("createdAt", -1)
+        await db.orders.find(find_query)
+        .sort([("createdAt", -1), ("id", -1)])
         .skip(skip)
-        .limit(limit)
-        .to_list(limit)
+        .limit(limit + 1)
+        .to_list(limit + 1)
     )
 
+    has_more = len(orders) > limit
+    orders = orders[:limit]
+
     for o in orders:
         o["_id"] = str(o["_id"])
         if "archived" not in o:
             o["archived"] = False
 
+    next_cursor = None
+    if has_more:
+        last = orders[-1]
+        next_cursor = _encode_cursor(sort_key, last.get("createdAt"), last.get("id"))
+
     return {
         "orders": orders,
         "total": total,
         "page": page,
-        "pages": (total + limit - 1) // limit,
+        "pages": (total + limit - 1) // limit if total is not None else None,
+        "hasMore": has_more,
+        "nextCursor": next_cursor,
     }
 
 
 def _order_lookup_filter(order_id: str) -> Dict[str, Any]:
-    filt: Dict[str, Any] = {"id": order_id}
-    try:
-        filt = {"$or": [{"_id": ObjectId(order_id)}, {"id": order_id}]}
-    except Exception:
-        filt = {"id": order_id}
-    return filt
+    # order ids are uuid4 strings, which are never valid 24-hex ObjectIds
+    if ObjectId.is_valid(order_id):
+        return {"_id": ObjectId(order_id)}
+    return {"id": order_id}
 
 
 @api_router.get("/orders/{order_id}")
@@ -833,30 +2673,62 @@ async def update_order(
 
     updates = updates or {}
     safe_updates = {k: v for k, v in updates.items() if k in allowed}
-
-    current = await db.orders.find_one(_order_lookup_filter(order_id))
-    if not current:
-        raise HTTPException(status_code=404, detail="Order not found")
+    expected_status = updates.get("expectedStatus")
 
     now_iso = datetime.now(timezone.utc).isoformat()
     safe_updates["updatedAt"] = now_iso
 
+    order_filter = _order_lookup_filter(order_id)
     new_status = safe_updates.get("status")
-    old_status = current.get("status")
 
-    if new_status and new_status != old_status:
-        if "statusHistory" not in safe_updates:
-            history = current.get("statusHistory") or []
-            if not isinstance(history, list):
-                history = []
-            history.append({"status": new_status, "at": now_iso, "note": None})
-            safe_updates["statusHistory"] = history
+    filt = dict(order_filter)
+    if expected_status:
+        filt["status"] = expected_status
+
+    update: Dict[str, Any] = {"$set": safe_updates}
+    push_history = bool(new_status) and "statusHistory" not in safe_updates
+    if push_history:
+        # only a real transition gets a history entry; $push keeps concurrent entries
+        update["$push"] = {"statusHistory": {"status": new_status, "at": now_iso, "note": None}}
+        if not expected_status:
+            filt["status"] = {"$ne": new_status}
+        elif expected_status == new_status:
+            update.pop("$push")
+
+    payment_update = safe_updates.get("payment")
+    payment_status = payment_update.get("status") if isinstance(payment_update, dict) else None
+
+    # a payment confirmed after the hold expired must get its stock back before
+    # the payment is saved; a 409 here leaves the order untouched
+    reclaimed = False
+    paid = str(payment_status or "").lower() in PAID_PAYMENT_STATUSES
+    if paid and str(new_status or "").lower() not in RELEASING_ORDER_STATUSES:
+        reclaimed = await _reclaim_expired_reservation(order_filter)
+
+    order = await db.orders.find_one_and_update(filt, update, return_document=ReturnDocument.AFTER)
+
+    if not order and push_history and not expected_status:
+        # status was already new_status: apply the other fields without a history entry
+        order = await db.orders.find_one_and_update(
+            order_filter,
+            {"$set": safe_updates},
+            return_document=ReturnDocument.AFTER,
+        )
 
-    result = await db.orders.update_one(_order_lookup_filter(order_id), {"$set": safe_updates})
-    if result.matched_count == 0:
+    if not order:
+        if reclaimed:
+            await _release_order_reservation(order_filter, ["committed"], "expired")
+        if expected_status and await db.orders.count_documents(order_filter, limit=1):
+            raise HTTPException(status_code=409, detail="Order status has changed; reload and try again")
         raise HTTPException(status_code=404, detail="Order not found")
 
-    return {"message": "Order updated"}
+    await _sync_order_reservation({"_id": order["_id"]}, new_status, payment_status)
+
+    order["_id"] = str(order["_id"])
+    if "archived" not in order:
+        order["archived"] = False
+
+    return {"message": "Order updated", "order": order}
 
 
 @api_router.patch("/orders/{order_id}/archive")
@@ -896,10 +2768,31 @@ async def create_review(review: Review):
     return review_dict
 
 
+REVIEW_PUBLIC_FIELDS = {
+    "_id": 0, "id": 1, "productId": 1, "customerName": 1, "rating": 1, "title": 1,
+    "comment": 1, "adminResponse": 1, "verifiedPurchase": 1, "createdAt": 1,
+}
+
+
+async def _review_summary(product_id: str) -> Dict[str, Any]:
+    product = await db.products.find_one(
+        {"id": product_id},
+        {"_id": 0, "ratingStats": 1, "averageRating": 1, "reviewCount": 1},
+    ) or {}
+    histogram = (product.get("ratingStats") or {}).get("histogram") or {}
+    return {
+        "averageRating": product.get("averageRating") or 0.0,
+        "reviewCount": product.get("reviewCount") or 0,
+        "histogram": {str(b): int(histogram.get(str(b)) or 0) for b in range(1, 6)},
+    }
+
+
 @api_router.get("/reviews")
 async def get_reviews(
     productId: Optional[str] = None,
     status: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
     session: Optional[Dict[str, Any]] = Depends(optional_admin),
 ):
     query: Dict[str, Any] = {}
@@ -914,36 +2807,170 @@ async def get_reviews(
     else:
         query["status"] = "approved"
 
-    reviews = await db.reviews.find(query, {"_id": 0}).sort("createdAt", -1).to_list(1000)
-    return reviews
+    # the first public page of a product is what every product page asks for
+    cache_key = None
+    if not is_admin and productId and not cursor:
+        cache_key = catalog_cache.key("reviews", productId=productId, limit=limit)
+        cached = catalog_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    sort_key = "createdAt:-1"
+    find_query = query
+    if cursor:
+        find_query = _with_keyset(query, "createdAt", -1, _decode_cursor(cursor, sort_key))
+
+    projection = {"_id": 0} if is_admin else REVIEW_PUBLIC_FIELDS
+    reviews = (
+        await db.reviews.find(find_query, projection)
+        .sort([("createdAt", -1), ("id", -1)])
+        .limit(limit + 1)
+        .to_list(limit + 1)
+    )
+
+    has_more = len(reviews) > limit
+    reviews = reviews[:limit]
+
+    next_cursor = None
+    if has_more:
+        last = reviews[-1]
+        next_cursor = _encode_cursor(sort_key, last.get("createdAt"), last.get("id"))
+
+    response: Dict[str, Any] = {"reviews": reviews, "hasMore": has_more, "nextCursor": next_cursor}
+    if productId and not cursor:
+        response["summary"] = await _review_summary(productId)
+
+    if cache_key:
+        catalog_cache.set(cache_key, response)
+    return response
+
+
+def _rating_bucket(rating: Any) -> int:
+    try:
+        return min(5, max(1, int(round(float(rating)))))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _approved_rating_changes(before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]) -> Dict[int, int]:
+    changes: Dict[int, int] = {}
+    for doc, delta in ((before, -1), (after, 1)):
+        if doc and doc.get("status") == "approved":
+            bucket = _rating_bucket(doc.get("rating"))
+            if bucket:
+                changes[bucket] = changes.get(bucket, 0) + delta
+    return {bucket: delta for bucket, delta in changes.items() if delta}
+
+
+def _rating_average_stage() -> Dict[str, Any]:
+    return {
+        "$set": {
+            "reviewCount": "$ratingStats.count",
+            "averageRating": {
+                "$cond": [
+                    {"$gt": ["$ratingStats.count", 0]},
+                    {"$round": [{"$divide": ["$ratingStats.sum", "$ratingStats.count"]}, 1]},
+                    0,
+                ]
+            },
+        }
+    }
+
+
+async def _apply_rating_changes(product_id: str, changes: Dict[int, int]) -> None:
+    if not product_id or not changes:
+        return
+
+    stats: Dict[str, Any] = {
+        "ratingStats.count": {"$add": [{"$ifNull": ["$ratingStats.count", 0]}, sum(changes.values())]},
+        "ratingStats.sum": {
+            "$add": [{"$ifNull": ["$ratingStats.sum", 0]}, sum(b * d for b, d in changes.items())]
+        },
+    }
+    for bucket, delta in changes.items():
+        path = f"ratingStats.histogram.{bucket}"
+        stats[path] = {"$add": [{"$ifNull": [f"${path}", 0]}, delta]}
+
+    # pipeline update: counters and the derived average move in one atomic write
+    await db.products.update_one({"id": product_id}, [{"$set": stats}, _rating_average_stage()])
+
+
+def _empty_rating_stats() -> Dict[str, Any]:
+    return {"count": 0, "sum": 0, "histogram": {str(b): 0 for b in range(1, 6)}}
+
+
+async def _rebuild_rating_stats() -> int:
+    rows = await db.reviews.aggregate([
+        {"$match": {"status": "approved"}},
+        {"$group": {"_id": {"productId": "$productId", "rating": "$rating"}, "count": {"$sum": 1}}},
+    ]).to_list(None)
+
+    stats: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        pid = str((row.get("_id") or {}).get("productId") or "")
+        bucket = _rating_bucket((row.get("_id") or {}).get("rating"))
+        if not pid or not bucket:
+            continue
+        entry = stats.setdefault(pid, _empty_rating_stats())
+        entry["count"] += row["count"]
+        entry["sum"] += bucket * row["count"]
+        entry["histogram"][str(bucket)] += row["count"]
+
+    ops = [
+        UpdateOne({"id": pid}, [{"$set": {"ratingStats": entry}}, _rating_average_stage()])
+        for pid, entry in stats.items()
+    ]
+    if ops:
+        await db.products.bulk_write(ops, ordered=False)
+    await db.products.update_many(
+        {"id": {"$nin": list(stats)}},
+        {"$set": {"ratingStats": _empty_rating_stats(), "reviewCount": 0, "averageRating": 0.0}},
+    )
+
+    catalog_cache.bump()
+    return len(stats)
+
+
+@api_router.post("/reviews/rebuild-ratings")
+async def rebuild_review_ratings(session: Dict[str, Any] = Depends(require_admin)):
+    products = await _rebuild_rating_stats()
+    return {"message": "Rating stats rebuilt", "productsWithReviews": products}
 
 
 @api_router.put("/reviews/{review_id}")
 async def update_review(review_id: str, updates: Dict[str, Any], session: Dict[str, Any] = Depends(require_admin)):
-    updates = updates or {}
+    updates = {k: v for k, v in (updates or {}).items() if k not in ("id", "productId", "_id")}
     updates["updatedAt"] = datetime.now(timezone.utc).isoformat()
-    result = await db.reviews.update_one({"id": review_id}, {"$set": updates})
-    if result.matched_count == 0:
+
+    before = await db.reviews.find_one_and_update(
+        {"id": review_id},
+        {"$set": updates},
+        projection={"_id": 0, "productId": 1, "status": 1, "rating": 1},
+    )
+    if not before:
         raise HTTPException(status_code=404, detail="Review not found")
 
-    if updates.get("status") == "approved":
-        review = await db.reviews.find_one({"id": review_id}, {"_id": 0})
-        if review:
-            approved_reviews = await db.reviews.find(
-                {"productId": review["productId"], "status": "approved"},
-                {"_id": 0},
-            ).to_list(1000)
-
-            if approved_reviews:
-                avg_rating = sum(r.get("rating", 0) for r in approved_reviews) / len(approved_reviews)
-                await db.products.update_one(
-                    {"id": review["productId"]},
-                    {"$set": {"averageRating": round(avg_rating, 1), "reviewCount": len(approved_reviews)}},
-                )
+    after = {**before, **{k: v for k, v in updates.items() if k in ("status", "rating")}}
+    await _apply_rating_changes(before.get("productId"), _approved_rating_changes(before, after))
+    catalog_cache.bump()
 
     return {"message": "Review updated"}
 
 
+@api_router.delete("/reviews/{review_id}")
+async def delete_review(review_id: str, session: Dict[str, Any] = Depends(require_admin)):
+    review = await db.reviews.find_one_and_delete(
+        {"id": review_id},
+        projection={"_id": 0, "productId": 1, "status": 1, "rating": 1},
+    )
+    if not review:
+        raise HTTPException(status_code=404, detail="Review not found")
+
+    await _apply_rating_changes(review.get("productId"), _approved_rating_changes(review, None))
+    catalog_cache.bump()
+    return {"message": "Review deleted"}
+
+
 # ============================ CATEGORIES ============================
 
 @api_router.get("/categories")
@@ -977,6 +3004,7 @@ async def create_category(category: Category, session: Dict[str, Any] = Depends(
         raise HTTPException(status_code=400, detail="Category slug already exists")
 
     await db.categories.insert_one(category_dict)
+    catalog_cache.bump()
     return _serialize_category(category_dict)
 
 @api_router.put("/categories/{category_id}")
@@ -1012,6 +3040,7 @@ async def update_category(category_id: str, category: Category, session: Dict[st
         raise HTTPException(status_code=400, detail="Category slug already exists")
 
     await db.categories.update_one({"id": category_id}, {"$set": category_dict})
+    catalog_cache.bump()
     return _serialize_category(category_dict)
 
 @api_router.delete("/categories/{category_id}")
@@ -1019,64 +3048,95 @@ async def delete_category(category_id: str, session: Dict[str, Any] = Depends(re
     result = await db.categories.delete_one({"id": category_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Category not found")
+    catalog_cache.bump()
     return {"message": "Category deleted"}
 
-@api_router.post("/categories/sync-from-products")
-async def sync_categories_from_products(session: Dict[str, Any] = Depends(require_admin)):
+async def _sync_categories_from_products(dry_run: bool = False) -> Dict[str, Any]:
     raw_categories = await db.products.distinct("category", {"status": "active"})
 
-    created = 0
-    updated = 0
-    results = []
-
+    names_by_slug: Dict[str, str] = {}
     for name in raw_categories:
         clean_name = str(name or "").strip()
-        if not clean_name:
-            continue
-
         slug = _slugify_text(clean_name)
-        if not slug:
-            continue
-
-        existing = await db.categories.find_one({"slug": slug}, {"_id": 0})
-
-        payload = {
-            "name": clean_name,
-            "slug": slug,
-            "description": existing.get("description", "") if existing else "",
-            "heroImage": existing.get("heroImage") if existing else None,
-            "active": existing.get("active", True) if existing else True,
-            "showInMenu": existing.get("showInMenu", True) if existing else True,
-            "featured": existing.get("featured", False) if existing else False,
-            "displayOrder": existing.get("displayOrder", 0) if existing else 0,
-            "updatedAt": datetime.now(timezone.utc).isoformat(),
-        }
+        if clean_name and slug:
+            names_by_slug[slug] = clean_name
+
+    existing = {
+        c["slug"]: c
+        for c in await db.categories.find(
+            {"slug": {"$in": list(names_by_slug)}},
+            {"_id": 0, "slug": 1, "name": 1},
+        ).to_list(None)
+    }
 
-        if existing:
-            await db.categories.update_one(
-                {"slug": slug},
-                {"$set": payload},
-            )
-            updated += 1
+    now_iso = datetime.now(timezone.utc).isoformat()
+    ops: List[UpdateOne] = []
+    results = []
+    counts = {"create": 0, "update": 0, "unchanged": 0}
+
+    for slug, name in names_by_slug.items():
+        current = existing.get(slug)
+        if current is None:
+            action = "create"
+        elif current.get("name") != name:
+            action = "update"
         else:
-            payload["id"] = str(uuid.uuid4())
-            payload["createdAt"] = datetime.now(timezone.utc).isoformat()
-            await db.categories.insert_one(payload)
-            created += 1
+            action = "unchanged"
 
+        counts[action] += 1
         results.append({
-            "name": clean_name,
+            "name": name,
             "slug": slug,
+            "action": action,
+            "previousName": current.get("name") if current else None,
         })
 
+        if action == "unchanged":
+            continue
+
+        # existing categories keep their storefront settings; only the name follows the products
+        ops.append(UpdateOne(
+            {"slug": slug},
+            {
+                "$set": {"name": name, "updatedAt": now_iso},
+                "$setOnInsert": {
+                    "id": str(uuid.uuid4()),
+                    "slug": slug,
+                    "description": "",
+                    "heroImage": None,
+                    "active": True,
+                    "showInMenu": True,
+                    "featured": False,
+                    "displayOrder": 0,
+                    "createdAt": now_iso,
+                },
+            },
+            upsert=True,
+        ))
+
+    if ops and not dry_run:
+        await db.categories.bulk_write(ops, ordered=False)
+        catalog_cache.bump()
+
     return {
-        "message": "Categories synced from products",
-        "created": created,
-        "updated": updated,
+        "dryRun": dry_run,
+        "created": counts["create"],
+        "updated": counts["update"],
+        "unchanged": counts["unchanged"],
         "categories": results,
     }
 
 
+@api_router.post("/categories/sync-from-products")
+async def sync_categories_from_products(
+    dryRun: bool = Query(False),
+    session: Dict[str, Any] = Depends(require_admin),
+):
+    result = await _sync_categories_from_products(dry_run=dryRun)
+    message = "Category sync preview" if dryRun else "Categories synced from products"
+    return {"message": message, **result}
+
+
 # ============================ STOREFRONT PAGES ============================
 
 @api_router.get("/pages")
@@ -1116,6 +3176,7 @@ async def create_storefront_page(page: StorefrontPage, session: Dict[str, Any] =
         page_dict["categorySlug"] = None
 
     await db.pages.insert_one(page_dict)
+    catalog_cache.bump()
     return page_dict
 
 @api_router.put("/pages/{page_id}")
@@ -1158,6 +3219,7 @@ async def update_storefront_page(page_id: str, page: StorefrontPage, session: Di
         page_dict["categorySlug"] = None
 
     await db.pages.update_one({"id": page_id}, {"$set": page_dict})
+    catalog_cache.bump()
     return page_dict
 
 @api_router.delete("/pages/{page_id}")
@@ -1165,17 +3227,24 @@ async def delete_storefront_page(page_id: str, session: Dict[str, Any] = Depends
     result = await db.pages.delete_one({"id": page_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Page not found")
+    catalog_cache.bump()
     return {"message": "Page deleted"}
 
 
 # ============================ STOREFRONT PUBLIC ============================
 
-@api_router.get("/storefront/navigation")
-async def get_storefront_navigation():
-    categories = await db.categories.find(
-        {"active": True},
-        {"_id": 0},
-    ).sort("displayOrder", 1).to_list(500)
+async def _build_navigation() -> Dict[str, Any]:
+    categories, pages, legacy_collections = await asyncio.gather(
+        db.categories.find({"active": True}, {"_id": 0}).sort("displayOrder", 1).to_list(500),
+        db.pages.find({"active": True}, {"_id": 0}).sort("displayOrder", 1).to_list(500),
+        db.collections.find({}, {"_id": 0}).sort("displayOrder", 1).to_list(100),
+    )
+
+    category_names = {
+        str(c.get("slug") or "").strip(): str(c.get("name") or "").strip()
+        for c in categories
+    }
+    category_counts, collection_counts, page_counts = await _navigation_counts(pages, category_names)
 
     category_items = []
 
@@ -1186,10 +3255,7 @@ async def get_storefront_navigation():
             if not name or not slug:
                 continue
 
-            product_count = await db.products.count_documents({
-                "status": "active",
-                "category": name,
-            })
+            product_count = category_counts.get(name, 0)
 
             category_items.append({
                 "id": c.get("id"),
@@ -1204,10 +3270,9 @@ async def get_storefront_navigation():
                 "path": f"/categories/{slug}",
             })
     else:
-        raw_categories = await db.products.distinct("category", {"status": "active"})
         fallback_categories = []
 
-        for name in raw_categories:
+        for name, product_count in category_counts.items():
             clean_name = str(name or "").strip()
             if not clean_name:
                 continue
@@ -1216,11 +3281,6 @@ async def get_storefront_navigation():
             if not slug:
                 continue
 
-            product_count = await db.products.count_documents({
-                "status": "active",
-                "category": clean_name,
-            })
-
             fallback_categories.append({
                 "id": f"fallback-{slug}",
                 "name": clean_name,
@@ -1236,20 +3296,13 @@ async def get_storefront_navigation():
 
         category_items = sorted(fallback_categories, key=lambda x: x["name"].lower())
 
-    pages = await db.pages.find(
-        {"active": True},
-        {"_id": 0},
-    ).sort("displayOrder", 1).to_list(500)
-
     page_items = []
-    for p in pages:
+    for p, product_count in zip(pages, page_counts):
         name = str(p.get("name") or "").strip()
         slug = str(p.get("slug") or "").strip()
         if not name or not slug:
             continue
 
-        page_products = await _resolve_page_products(p, limit=1000)
-
         page_items.append({
             "id": p.get("id"),
             "name": name,
@@ -1261,16 +3314,10 @@ async def get_storefront_navigation():
             "showInHeader": bool(p.get("showInHeader", False)),
             "showInFooter": bool(p.get("showInFooter", True)),
             "displayOrder": int(p.get("displayOrder") or 0),
-            "productCount": len(page_products),
+            "productCount": product_count,
             "path": f"/pages/{slug}",
         })
 
-    legacy_collections = (
-        await db.collections.find({}, {"_id": 0})
-        .sort("displayOrder", 1)
-        .to_list(100)
-    )
-
     collections = []
     for c in legacy_collections:
         slug = str(c.get("slug") or "").strip()
@@ -1279,10 +3326,7 @@ async def get_storefront_navigation():
         if not slug or not name:
             continue
 
-        product_count = await db.products.count_documents({
-            "status": "active",
-            "collections": slug,
-        })
+        product_count = collection_counts.get(slug, 0)
 
         collections.append({
             "id": c.get("id"),
@@ -1296,42 +3340,126 @@ async def get_storefront_navigation():
             "path": f"/?collection={slug}",
         })
 
+    category_list = [
+        {
+            **c,
+            "productCount": category_counts.get(str(c.get("name") or "").strip(), 0),
+            "path": f"/categories/{str(c.get('slug') or '').strip()}",
+        }
+        for c in categories
+        if str(c.get("name") or "").strip() and str(c.get("slug") or "").strip()
+    ]
+
+    page_list = [
+        {**p, "productCount": product_count, "path": f"/pages/{p.get('slug')}"}
+        for p, product_count in zip(pages, page_counts)
+    ]
+
     return {
-        "categories": category_items,
-        "pages": page_items,
-        "collections": collections,
+        "navigation": {
+            "categories": category_items,
+            "pages": page_items,
+            "collections": collections,
+        },
+        "categories": category_list,
+        "pages": page_list,
     }
 
-@api_router.get("/storefront/categories")
-async def get_storefront_categories():
-    categories = await db.categories.find(
-        {"active": True},
-        {"_id": 0},
-    ).sort("displayOrder", 1).to_list(500)
+NAVIGATION_REFRESH_INTERVAL = float(os.environ.get("NAVIGATION_REFRESH_INTERVAL", "30"))
+
+
+class _NavigationSnapshot:
+    def __init__(self, refresh_interval: float):
+        self.refresh_interval = refresh_interval
+        self.version = 0
+        self.built_at: Optional[str] = None
+        self.builds = 0
+        self._parts: Dict[str, Any] = {}
+        self._etags: Dict[str, str] = {}
+        self._generation: Optional[int] = None
+        self._lock = asyncio.Lock()
+
+    async def get(self, part: str) -> Tuple[Any, str]:
+        if not self._parts:
+            await self.rebuild()
+        elif self._generation != catalog_cache.generation:
+            # a write through this worker must show up in the writer's next
+            # request; concurrent callers share the one rebuild behind the lock
+            try:
+                await self.rebuild()
+            except Exception as e:
+                logger.warning("Navigation snapshot rebuild failed, serving previous: %s", e)
+        return self._parts[part], self._etags[part]
+
+    async def rebuild(self, force: bool = False) -> None:
+        async with self._lock:
+            generation = catalog_cache.generation
+            if self._parts and generation == self._generation and not force:
+                return
+
+            parts = await _build_navigation()
+            etags = {name: _content_digest(value) for name, value in parts.items()}
+            if etags != self._etags:
+                self.version += 1
+            self._parts, self._etags = parts, etags
+            self._generation = generation
+            self.built_at = datetime.now(timezone.utc).isoformat()
+            self.builds += 1
+
+    async def run(self) -> None:
+        # picks up writes made through other workers, which never bump this cache
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.rebuild(force=True)
+            except Exception as e:
+                logger.warning("Navigation snapshot refresh failed: %s", e)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "builtAt": self.built_at,
+            "builds": self.builds,
+            "stale": self._generation != catalog_cache.generation,
+            "refreshInterval": self.refresh_interval,
+        }
 
-    result = []
-    for c in categories:
-        name = str(c.get("name") or "").strip()
-        slug = str(c.get("slug") or "").strip()
-        if not name or not slug:
-            continue
 
-        product_count = await db.products.count_documents({
-            "status": "active",
-            "category": name,
-        })
+navigation_snapshot = _NavigationSnapshot(NAVIGATION_REFRESH_INTERVAL)
+
+
+async def _navigation_response(request: Request, part: str) -> Response:
+    body, digest = await navigation_snapshot.get(part)
+    return _etag_response(
+        request,
+        body,
+        f'"{part}-{digest}"',
+        {"X-Navigation-Version": str(navigation_snapshot.version)},
+    )
+
+
+@api_router.get("/storefront/navigation")
+async def get_storefront_navigation(request: Request):
+    return await _navigation_response(request, "navigation")
 
-        result.append({
-            **c,
-            "productCount": product_count,
-            "path": f"/categories/{slug}",
-        })
 
-    return result
+@api_router.get("/storefront/categories")
+async def get_storefront_categories(request: Request):
+    return await _navigation_response(request, "categories")
 
 
 @api_router.get("/storefront/categories/{slug}")
-async def get_storefront_category_by_slug(slug: str):
+async def get_storefront_category_by_slug(
+    slug: str,
+    fields: Optional[str] = None,
+    currency: Optional[str] = None,
+):
+    conversion = await _currency_conversion(currency)
+    cache_key = catalog_cache.key("storefront_category", slug=slug, fields=fields, currency=conversion)
+    cached = catalog_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     category = await db.categories.find_one(
         {"slug": slug, "active": True},
         {"_id": 0},
@@ -1342,40 +3470,38 @@ async def get_storefront_category_by_slug(slug: str):
     category_name = str(category.get("name") or "").strip()
 
     products = await db.products.find(
-        {"category": category_name, "status": "active"},
-        {"_id": 0},
+        _category_product_query(slug, category_name),
+        _product_projection(fields),
     ).sort("createdAt", -1).to_list(200)
 
-    return {
+    response = {
         "category": {
             **category,
             "path": f"/categories/{slug}",
         },
-        "products": products,
+        "products": _convert_products(products, conversion),
     }
+    catalog_cache.set(cache_key, response)
+    return response
 
 
 @api_router.get("/storefront/pages")
-async def get_storefront_pages():
-    pages = await db.pages.find(
-        {"active": True},
-        {"_id": 0},
-    ).sort("displayOrder", 1).to_list(500)
-
-    result = []
-    for p in pages:
-        resolved = await _resolve_page_products(p, limit=1000)
-        result.append({
-            **p,
-            "productCount": len(resolved),
-            "path": f"/pages/{p.get('slug')}",
-        })
-
-    return result
+async def get_storefront_pages(request: Request):
+    return await _navigation_response(request, "pages")
 
 
 @api_router.get("/storefront/pages/{slug}")
-async def get_storefront_page_by_slug(slug: str):
+async def get_storefront_page_by_slug(
+    slug: str,
+    fields: Optional[str] = None,
+    currency: Optional[str] = None,
+):
+    conversion = await _currency_conversion(currency)
+    cache_key = catalog_cache.key("storefront_page", slug=slug, fields=fields, currency=conversion)
+    cached = catalog_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     page = await db.pages.find_one(
         {"slug": slug, "active": True},
         {"_id": 0},
@@ -1383,15 +3509,17 @@ async def get_storefront_page_by_slug(slug: str):
     if not page:
         raise HTTPException(status_code=404, detail="Page not found")
 
-    products = await _resolve_page_products(page, limit=200)
+    products = await _resolve_page_products(page, limit=200, projection=_product_projection(fields))
 
-    return {
+    response = {
         "page": {
             **page,
             "path": f"/pages/{slug}",
         },
-        "products": products,
+        "products": _convert_products(products, conversion),
     }
+    catalog_cache.set(cache_key, response)
+    return response
 
 
 # ============================ COLLECTIONS (LEGACY / COMPATIBILITY) ============================
@@ -1406,6 +3534,7 @@ async def list_collections(session: Dict[str, Any] = Depends(require_admin)):
 async def create_collection(collection: Collection, session: Dict[str, Any] = Depends(require_admin)):
     collection_dict = collection.dict()
     await db.collections.insert_one(collection_dict)
+    catalog_cache.bump()
     return collection_dict
 
 
@@ -1415,32 +3544,101 @@ async def update_collection(collection_id: str, collection: Collection, session:
     result = await db.collections.update_one({"id": collection_id}, {"$set": collection_dict})
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Collection not found")
+    catalog_cache.bump()
     return collection_dict
 
 
 # ============================ SETTINGS ============================
 
+SETTINGS_REFRESH_INTERVAL = float(os.environ.get("SETTINGS_REFRESH_INTERVAL", "30"))
+
+
+class _SettingsCache:
+    def __init__(self, refresh_interval: float):
+        self.refresh_interval = refresh_interval
+        self.version = 0
+        self.digest: Optional[str] = None
+        self.loaded_at: Optional[str] = None
+        self.loads = 0
+        self._value: Optional[Dict[str, Any]] = None
+        self._lock = asyncio.Lock()
+
+    async def get(self) -> Dict[str, Any]:
+        # callers share this dict; treat it as read-only
+        if self._value is None:
+            await self.load()
+        return self._value
+
+    async def load(self) -> None:
+        async with self._lock:
+            doc = await db.settings.find_one({}, {"_id": 0})
+            # an empty collection is served defaults without writing on the read path
+            self.store(doc or Settings().dict())
+
+    def store(self, doc: Dict[str, Any]) -> None:
+        value = dict(doc)
+        self.version = int(value.pop("version", 0) or 0)
+        self._value = value
+        self.digest = _content_digest(value)
+        self.loaded_at = datetime.now(timezone.utc).isoformat()
+        self.loads += 1
+
+    async def run(self) -> None:
+        # settings written through another worker are picked up by version
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                doc = await db.settings.find_one({}, {"_id": 0, "version": 1})
+                if int((doc or {}).get("version") or 0) != self.version:
+                    await self.load()
+            except Exception as e:
+                logger.warning("Settings refresh failed: %s", e)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "loadedAt": self.loaded_at,
+            "loads": self.loads,
+            "refreshInterval": self.refresh_interval,
+        }
+
+
+settings_cache = _SettingsCache(SETTINGS_REFRESH_INTERVAL)
+
+
 @api_router.get("/settings")
-async def get_settings():
-    settings = await db.settings.find_one({}, {"_id": 0})
-    if not settings:
-        default_settings = Settings().dict()
-        await db.settings.insert_one(default_settings)
-        return default_settings
-    return settings
+async def get_settings(request: Request):
+    settings = await settings_cache.get()
+    return _etag_response(
+        request,
+        settings,
+        f'"settings-{settings_cache.version}-{settings_cache.digest[:16]}"',
+        {"X-Settings-Version": str(settings_cache.version)},
+    )
 
 
 @api_router.put("/settings")
 async def update_settings(settings: Settings, session: Dict[str, Any] = Depends(require_admin)):
     settings_dict = settings.dict()
-    await db.settings.update_one({}, {"$set": settings_dict}, upsert=True)
+    doc = await db.settings.find_one_and_update(
+        {},
+        {"$set": settings_dict, "$inc": {"version": 1}},
+        projection={"_id": 0},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    settings_cache.store(doc)
     return settings_dict
 
 
 # ==================== ADMIN AUTH ====================
 
 @api_router.post("/admin/change-password")
-async def admin_change_password(payload: AdminChangePassword, session: Dict[str, Any] = Depends(require_admin)):
+async def admin_change_password(
+    payload: AdminChangePassword,
+    request: Request,
+    session: Dict[str, Any] = Depends(require_admin),
+):
     stored = await db.admin.find_one({"key": "password"}, {"_id": 0})
     if not stored or "value" not in stored:
         raise HTTPException(status_code=500, detail="Admin password not initialized")
@@ -1458,23 +3656,31 @@ async def admin_change_password(payload: AdminChangePassword, session: Dict[str,
     if not _is_strong_password(new):
         raise HTTPException(status_code=400, detail="New password must be at least 10 characters")
 
-    current_hash = _hash_pw(cur)
-    if current_hash != stored["value"]:
+    # only attempts that reach the hash count; a mistyped confirmation is not a guess
+    ip = _client_ip(request)
+    login_throttle.hit(ip)
+
+    ok, _ = await password_service.verify(cur, stored["value"])
+    if not ok:
         raise HTTPException(status_code=401, detail="Current password is incorrect")
+    login_throttle.reset(ip)
 
-    new_hash = _hash_pw(new)
+    new_hash = await password_service.hash(new)
     await db.admin.update_one(
         {"key": "password"},
         {"$set": {"key": "password", "value": new_hash}},
         upsert=True,
     )
 
-    await db.admin.delete_one({"key": "session"})
+    await admin_tokens.revoke_all()
     return {"message": "Password changed. Please login again."}
 
 
 @api_router.post("/admin/recovery-reset-password")
-async def admin_recovery_reset_password(payload: AdminRecoveryReset):
+async def admin_recovery_reset_password(payload: AdminRecoveryReset, request: Request):
+    ip = _client_ip(request)
+    login_throttle.hit(ip)
+
     expected = (os.environ.get("ADMIN_RECOVERY_KEY") or "").strip()
     if not expected:
         raise HTTPException(status_code=500, detail="ADMIN_RECOVERY_KEY not configured on server")
@@ -1483,8 +3689,9 @@ async def admin_recovery_reset_password(payload: AdminRecoveryReset):
     new = (payload.newPassword or "").strip()
     conf = (payload.confirmPassword or "").strip()
 
-    if key != expected:
+    if not hmac.compare_digest(key.encode("utf-8"), expected.encode("utf-8")):
         raise HTTPException(status_code=401, detail="Invalid recovery key")
+    login_throttle.reset(ip)
 
     if not new or not conf:
         raise HTTPException(status_code=400, detail="New password fields are required")
@@ -1497,17 +3704,18 @@ async def admin_recovery_reset_password(payload: AdminRecoveryReset):
 
     await db.admin.update_one(
         {"key": "password"},
-        {"$set": {"key": "password", "value": _hash_pw(new)}},
+        {"$set": {"key": "password", "value": await password_service.hash(new)}},
         upsert=True,
     )
 
-    await db.admin.delete_one({"key": "session"})
+    await admin_tokens.revoke_all()
     return {"message": "Password reset successfully. Please login again."}
 
 
 @api_router.post("/admin/login")
-async def admin_login(login: AdminLogin):
-    password_hash = _hash_pw(login.password)
+async def admin_login(login: AdminLogin, request: Request):
+    ip = _client_ip(request)
+    login_throttle.hit(ip)
 
     stored_hash = await db.admin.find_one({"key": "password"}, {"_id": 0})
     if not stored_hash or "value" not in stored_hash:
@@ -1516,25 +3724,25 @@ async def admin_login(login: AdminLogin):
             detail="Admin password not initialized. Set it once in the database.",
         )
 
-    if password_hash != stored_hash["value"]:
+    ok, needs_upgrade = await password_service.verify(login.password, stored_hash["value"])
+    if not ok:
         raise HTTPException(status_code=401, detail="Invalid password")
+    login_throttle.reset(ip)
 
-    token = str(uuid.uuid4())
-    expires_at = datetime.now(timezone.utc) + timedelta(hours=24)
-    session = {"token": token, "expiresAt": expires_at.isoformat()}
-
-    await db.admin.update_one(
-        {"key": "session"},
-        {"$set": {"key": "session", "value": session}},
-        upsert=True,
-    )
+    if needs_upgrade:
+        # conditional on the old hash so a concurrent password change wins
+        await db.admin.update_one(
+            {"key": "password", "value": stored_hash["value"]},
+            {"$set": {"value": await password_service.hash(login.password)}},
+        )
 
-    return session
+    await admin_tokens.ensure_loaded()
+    return admin_tokens.issue()
 
 
 @api_router.post("/admin/logout")
 async def admin_logout(session: Dict[str, Any] = Depends(require_admin)):
-    await db.admin.delete_one({"key": "session"})
+    await admin_tokens.revoke(session)
     return {"message": "Logged out"}
 
 
@@ -1545,21 +3753,77 @@ async def verify_admin(session: Dict[str, Any] = Depends(require_admin)):
 
 # ============================ ANALYTICS ============================
 
+ANALYTICS_TIMESERIES = os.environ.get("ANALYTICS_TIMESERIES", "").strip().lower() in ("1", "true", "yes")
+
+
+async def _ensure_analytics_collection() -> None:
+    if not ANALYTICS_TIMESERIES:
+        return
+    if "analytics" in await db.list_collection_names(filter={"name": "analytics"}):
+        return
+    await db.create_collection(
+        "analytics",
+        timeseries={"timeField": "timestamp", "metaField": "meta", "granularity": "seconds"},
+    )
+
+
+def _analytics_doc(event: AnalyticsEvent, received_at: datetime) -> Optional[Dict[str, Any]]:
+    properties = event.properties or {}
+    if len(json.dumps(properties, default=str)) > ANALYTICS_MAX_PROPERTIES_BYTES:
+        return None
+    return {
+        "timestamp": received_at,
+        "meta": {"event": event.event, "sessionId": event.sessionId},
+        "event": event.event,
+        "clientTimestamp": event.timestamp,
+        "properties": properties,
+    }
+
+
+def _enqueue_analytics(events: List[AnalyticsEvent]) -> Dict[str, int]:
+    received_at = datetime.now(timezone.utc)
+    docs = [d for d in (_analytics_doc(e, received_at) for e in events) if d is not None]
+    accepted = analytics_buffer.offer(docs)
+    if docs and not accepted:
+        raise HTTPException(
+            status_code=503,
+            detail="Analytics queue is full",
+            headers={"Retry-After": "1"},
+        )
+    return {"accepted": accepted, "rejected": len(events) - accepted}
+
+
+@api_router.post("/analytics/events", status_code=202)
+async def ingest_analytics(request: Request):
+    # parsed from the raw body whatever the content type: the pagehide beacon
+    # is sent as text/plain, since a cross-origin JSON beacon needs a preflight
+    # that browsers will not send for it
+    try:
+        batch = AnalyticsBatch.model_validate_json(await request.body())
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=_validation_message(e))
+    return _enqueue_analytics(batch.events)
+
+
 @api_router.post("/analytics/track")
 async def track_analytics(event: Dict[str, Any], session: Dict[str, Any] = Depends(require_admin)):
     if not isinstance(event, dict):
         raise HTTPException(status_code=400, detail="Invalid event payload")
-    event["timestamp"] = datetime.now(timezone.utc).isoformat()
-    await db.analytics.insert_one(event)
+    name = event.pop("event", None) or event.pop("type", None) or "admin_event"
+    try:
+        parsed = AnalyticsEvent(event=name, properties=event)
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=_validation_message(e))
+    _enqueue_analytics([parsed])
     return {"message": "Event tracked"}
 
 
 # ============================ REPORTS ============================
 
 @api_router.get("/reports/bestsellers")
-async def get_bestsellers(limit: int = 10):
+async def get_bestsellers(limit: int = 10, fields: Optional[str] = None):
     products = (
-        await db.products.find({"status": "active"}, {"_id": 0})
+        await db.products.find({"status": "active"}, _product_projection(fields, "totalPurchases"))
         .sort("totalPurchases", -1)
         .limit(limit)
         .to_list(limit)
@@ -1591,6 +3855,28 @@ async def get_revenue(start_date: Optional[str] = None, end_date: Optional[str]
     }
 
 
+# ============================ ADMIN MAINTENANCE ============================
+
+@api_router.get("/admin/indexes")
+async def admin_index_report(session: Dict[str, Any] = Depends(require_admin)):
+    return {"collections": await _index_report()}
+
+
+@api_router.get("/admin/cache-stats")
+async def admin_cache_stats(session: Dict[str, Any] = Depends(require_admin)):
+    return {
+        "catalog": catalog_cache.stats(),
+        "navigation": navigation_snapshot.stats(),
+        "settings": settings_cache.stats(),
+        "analytics": analytics_buffer.stats(),
+    }
+
+
+@api_router.post("/admin/indexes/sync")
+async def admin_sync_indexes(session: Dict[str, Any] = Depends(require_admin)):
+    return await _apply_index_registry()
+
+
 # ============================ UPLOADS ============================
 
 @api_router.post("/admin/upload-image")
@@ -1702,6 +3988,50 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+@app.on_event("startup")
+async def ensure_indexes():
+    try:
+        await _run_backfills()
+    except Exception as e:
+        logger.warning("Startup backfills failed: %s", e)
+
+    result = await _apply_index_registry()
+    if result["failed"]:
+        logger.warning("%d declared indexes could not be applied", len(result["failed"]))
+
+
+@app.on_event("startup")
+async def start_counter_buffers():
+    view_counter.start()
+    try:
+        await _ensure_analytics_collection()
+    except Exception as e:
+        logger.warning("Could not create analytics time-series collection: %s", e)
+    analytics_buffer.start()
+
+
+_background_tasks: List[asyncio.Task] = []
+
+
+@app.on_event("startup")
+async def start_background_tasks():
+    try:
+        await settings_cache.load()
+        await admin_tokens.load()
+    except Exception as e:
+        logger.warning("Could not preload settings or admin tokens: %s", e)
+
+    loop = asyncio.get_running_loop()
+    _background_tasks.append(loop.create_task(_reservation_sweeper()))
+    _background_tasks.append(loop.create_task(navigation_snapshot.run()))
+    _background_tasks.append(loop.create_task(settings_cache.run()))
+    _background_tasks.append(loop.create_task(admin_tokens.run()))
+
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    for task in _background_tasks:
+        task.cancel()
+    await view_counter.stop()
+    await analytics_buffer.stop()
     client.close()
\ No newline at end of file
@@ -51,19 +51,20 @@ export default function CartDrawer({ open, onClose }) {
     setCart(cartData);
 
     try {
-      const productPromises = cartData.items.map((item) =>
-        api.get(`/products/${item.productId}`)
-      );
-
-      const responses = await Promise.all(productPromises);
-
       const productsMap = {};
-      responses.forEach((res) => {
-        const p = res?.data;
-        if (p?.id) productsMap[p.id] = p;
-        // fallback: if backend returns _id
-        else if (p?._id) productsMap[p._id] = p;
-      });
+
+      if (cartData.items.length > 0) {
+        const res = await api.post("/products/batch", {
+          items: cartData.items.map((item) => ({
+            productId: item.productId,
+            variantId: item.variantId || null,
+          })),
+        });
+
+        safeArr(res?.data?.products).forEach((p) => {
+          if (p?.id) productsMap[p.id] = p;
+        });
+      }
 
       setProducts(productsMap);
     } catch (error) {
@@ -107,17 +107,17 @@ export default function Checkout() {
     setCart(cartData);
 
     try {
-      const productPromises = cartData.items.map((item) =>
-        api.get(`/products/${item.productId}`)
-      );
+      // one batch request; GET /products/{id} would also count a product view per line
+      const res = await api.post("/products/batch", {
+        items: cartData.items.map((item) => ({
+          productId: item.productId,
+          variantId: item.variantId || null,
+        })),
+      });
 
-      const responses = await Promise.all(productPromises);
       const productsMap = {};
-      responses.forEach((res) => {
-        const p = res?.data;
-        if (!p) return;
+      safeArr(res?.data?.products).forEach((p) => {
         if (p?.id) productsMap[p.id] = p;
-        if (p?._id) productsMap[p._id] = p;
       });
       setProducts(productsMap);
     } catch (error) {
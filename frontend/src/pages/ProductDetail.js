@@ -86,7 +86,7 @@ export default function ProductDetail() {
     setLoading(true);
     try {
       const response = await axios.get(`${API}/products`, {
-        params: { limit: 100 },
+        params: { limit: 100, fields: "full" },
       });
 
       const list = response.data?.products || [];
@@ -92,7 +92,10 @@ export default function StorefrontPage() {
         ? `/storefront/categories/${slug}`
         : `/storefront/pages/${slug}`;
 
-      const response = await api.get(endpoint);
+      // the page search box also matches on longDescription
+      const response = await api.get(endpoint, {
+        params: { fields: "card,longDescription" },
+      });
       const data = response?.data || {};
 
       const entity = data.page || data.category || null;
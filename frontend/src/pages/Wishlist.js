@@ -40,15 +40,19 @@ export default function Wishlist() {
 
     if (safeWishlistIds.length > 0) {
       try {
-        const response = await axios.get(`${API}/products`, {
-          params: { limit: 100 },
-        });
-
-        const allProducts = response.data?.products || [];
-        const wishlistProducts = allProducts.filter((p) =>
-          safeWishlistIds.includes(getProductId(p))
+        // fetch exactly the wishlisted ids; the batch endpoint takes 100 per call
+        const chunks = [];
+        for (let i = 0; i < safeWishlistIds.length; i += 100) {
+          chunks.push(safeWishlistIds.slice(i, i + 100));
+        }
+        const responses = await Promise.all(
+          chunks.map((ids) => axios.post(`${API}/products/batch`, { ids }))
         );
 
+        const wishlistProducts = responses
+          .flatMap((response) => response.data?.products || [])
+          .filter((p) => p.status === "active");
+
         setProducts(wishlistProducts);
       } catch (error) {
         console.error("Error loading wishlist products:", error);
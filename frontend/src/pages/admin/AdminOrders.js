@@ -160,9 +160,9 @@ export default function AdminOrders() {
     });
   }, [orders, searchTerm, filterStatus]);
 
-  const quickUpdateStatus = async (orderId, newStatus) => {
+  const quickUpdateStatus = async (orderId, newStatus, expectedStatus) => {
     try {
-      await api.put(`/orders/${orderId}`, { status: newStatus });
+      await api.put(`/orders/${orderId}`, { status: newStatus, expectedStatus });
       toast.success(`Order marked as ${newStatus}`);
       await loadOrders();
     } catch (error) {
@@ -345,7 +345,7 @@ export default function AdminOrders() {
 
                       {order.status === "pending" && !order.archived && (
                         <button
-                          onClick={() => quickUpdateStatus(order.id, "processing")}
+                          onClick={() => quickUpdateStatus(order.id, "processing", "pending")}
                           className="p-2 hover:bg-secondary transition-colors text-gold"
                           title="Mark as Processing"
                         >
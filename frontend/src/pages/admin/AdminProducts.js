@@ -124,7 +124,7 @@ export default function AdminProducts() {
   const loadProducts = async () => {
     setLoading(true);
     try {
-      const params = { page: 1, limit: 100 };
+      const params = { page: 1, limit: 100, fields: "full" };
       if (filterCategory) params.category = filterCategory;
 
       const response = await api.get("/products", { params });
@@ -25,15 +25,25 @@ export default function AdminReviews() {
   const loadReviews = async () => {
     setLoading(true);
     try {
-      const params = {};
+      const params = { limit: 100 };
       if (filterStatus) params.status = filterStatus;
 
-      const response = await api.get(`/reviews`, { params });
-
-      // backend may return array OR {reviews:[]}
-      const data = Array.isArray(response.data)
-        ? response.data
-        : safeArr(response.data?.reviews);
+      // the endpoint is paginated; follow nextCursor until every review is loaded
+      const data = [];
+      for (;;) {
+        const response = await api.get(`/reviews`, { params });
+
+        // backend may return array OR {reviews:[], nextCursor}
+        if (Array.isArray(response.data)) {
+          data.push(...response.data);
+          break;
+        }
+        data.push(...safeArr(response.data?.reviews));
+
+        const next = response.data?.nextCursor;
+        if (!response.data?.hasMore || !next) break;
+        params.cursor = next;
+      }
 
       setReviews(data);
     } catch (error) {
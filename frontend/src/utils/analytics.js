@@ -1,5 +1,52 @@
 // Client-side analytics tracker
-// Logs events to console and could be connected to analytics service
+// Logs events to console and sends them in batches to /api/analytics/events
+
+import api from '@/api';
+
+const FLUSH_INTERVAL_MS = 5000;
+const FLUSH_SIZE = 20;
+
+let pending = [];
+let flushTimer = null;
+
+function eventsUrl() {
+  return `${api?.defaults?.baseURL || ''}/analytics/events`;
+}
+
+function flush(useBeacon = false) {
+  if (flushTimer) {
+    clearTimeout(flushTimer);
+    flushTimer = null;
+  }
+  if (pending.length === 0) return;
+
+  const events = pending;
+  pending = [];
+  const body = JSON.stringify({ events });
+
+  if (useBeacon && navigator.sendBeacon) {
+    // text/plain keeps the beacon a simple cross-origin request; a JSON
+    // content type needs a CORS preflight and the browser drops the beacon
+    navigator.sendBeacon(eventsUrl(), new Blob([body], { type: 'text/plain' }));
+    return;
+  }
+
+  // fire-and-forget: analytics must never block or break the page
+  api.post('/analytics/events', { events }).catch(() => {});
+}
+
+function enqueue(event) {
+  pending.push(event);
+  if (pending.length >= FLUSH_SIZE) {
+    flush();
+  } else if (!flushTimer) {
+    flushTimer = setTimeout(flush, FLUSH_INTERVAL_MS);
+  }
+}
+
+if (typeof window !== 'undefined') {
+  window.addEventListener('pagehide', () => flush(true));
+}
 
 const analytics = {
   track(eventName, properties = {}) {
@@ -10,6 +57,8 @@ const analytics = {
     };
     
     console.log('[Analytics]', event);
+
+    enqueue({ event: eventName, timestamp: event.timestamp, properties });
     
     // Store in localStorage for reporting
     const events = JSON.parse(localStorage.getItem('analytics_events') || '[]');